@@ -5,8 +5,19 @@ from fastapi import FastAPI, Request, BackgroundTasks
 from environment import DynamicEnvironmentSetup
 from proxy.api_proxy import APIProxy
 from proxy.event_proxy import EventProxy
+from proxy.queue_proxy import QueueProxy
+from apps.internal_routes import router as internal_router
+from recorder import TrafficRecorder
+import logger
+from logger import get_logger
+
+logger.setup()
+log = get_logger("dynamic_app")
 
 app = FastAPI(title="Azure Functions Local Proxy")
+app.include_router(internal_router)
+if os.getenv("RECORD_TRAFFIC"):
+    app.add_middleware(TrafficRecorder)
 
 @app.api_route("/api/{function_path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"])
 async def proxy_http_function(request: Request, function_path: str):
@@ -18,14 +29,22 @@ async def proxy_event_function(request: Request, function_path: str, background_
     """Endpoint for EventGridTrigger"""
     return await EventProxy(request, function_path, background_tasks=background_tasks).proxy_function()
 
+@app.api_route("/queue/{queue_name:path}", methods=["POST"])
+async def enqueue_queue_message(request: Request, queue_name: str):
+    """Endpoint for queueTrigger and serviceBusTrigger"""
+    return await QueueProxy(request, queue_name).enqueue()
+
 @app.on_event("startup")
 async def startup_event():
-    print("Starting in Dynamic Mode")
+    log.info("Starting in Dynamic Mode")
     settuper = DynamicEnvironmentSetup()
     settuper.setup_environment()
+    settuper.setup_function_registry()
     settuper.setup_executor()
+    settuper.setup_event_bus()
+    settuper.setup_local_queues()
     settuper.setup_file_watcher()
 
     port = int(os.getenv("PORT", 3000))
-    print("Azure Functions Local Proxy started")
-    print(f"Access your functions in: http://localhost:{port}/api/Project.Function ou http://localhost:{port}/event/Project.Function")
\ No newline at end of file
+    log.info("Azure Functions Local Proxy started")
+    log.info(f"Access your functions in: http://localhost:{port}/api/Project.Function ou http://localhost:{port}/event/Project.Function")
\ No newline at end of file
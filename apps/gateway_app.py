@@ -0,0 +1,86 @@
+import os
+import json
+import asyncio
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from proxy.gateway_proxy import GatewayProxy
+from supervisor import Supervisor
+from recorder import TrafficRecorder
+import logger
+from logger import get_logger
+
+logger.setup()
+log = get_logger("gateway_app")
+
+app = FastAPI(title="Azure Functions Local Proxy - Gateway")
+if os.getenv("RECORD_TRAFFIC"):
+    app.add_middleware(TrafficRecorder)
+
+PORT = int(os.getenv("PORT", 3000))
+supervisor = Supervisor(Supervisor.load_config(), PORT)
+
+def split_function_path(function_path: str):
+    """Project.Function/rest -> (Project, Function/rest)"""
+    first, _, rest = function_path.partition("/")
+    project, _, function = first.partition(".")
+    if not project or not function:
+        return None, None
+    return project, f"{function}/{rest}" if rest else function
+
+def unknown_project(function_path: str, project: str):
+    if not project:
+        return JSONResponse(status_code=400, content={"error": f"Invalid Path: '{function_path}'. Use the format Project.Function"})
+    return JSONResponse(status_code=404, content={"error": f"Project '{project}' is not served by this gateway"})
+
+@app.api_route("/api/{function_path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"])
+async def proxy_http_function(request: Request, function_path: str):
+    """Endpoint for HTTP, forwarded to the worker of the project"""
+    project, path = split_function_path(function_path)
+    worker = supervisor.get(project) if project else None
+    if not worker:
+        return unknown_project(function_path, project)
+    return await GatewayProxy(request, worker, f"/api/{path}").forward()
+
+@app.api_route("/event/{function_path}", methods=["POST"])
+async def proxy_event_function(request: Request, function_path: str):
+    """Endpoint for EventGridTrigger, forwarded to the worker of the project"""
+    project, function = split_function_path(function_path)
+    worker = supervisor.get(project) if project else None
+    if not worker:
+        return unknown_project(function_path, project)
+    return await GatewayProxy(request, worker, f"/event/{function}").forward()
+
+@app.api_route("/queue/{queue_name:path}", methods=["POST"])
+async def proxy_queue_message(request: Request, queue_name: str):
+    """Endpoint for queueTrigger and serviceBusTrigger, sent to every worker with a function bound to the queue"""
+    body = await request.body()
+    responses = await asyncio.gather(*(
+        GatewayProxy(request, worker, f"/queue/{queue_name}", body=body).forward()
+        for worker in supervisor.workers.values()
+    ))
+    accepted = {}
+    for project, response in zip(supervisor.workers, responses):
+        if response.status_code == 404:
+            continue
+        if response.status_code != 200:
+            return response
+        accepted[project] = json.loads(response.body)["queues"]
+    if not accepted:
+        return JSONResponse(status_code=404, content={"error": f"No project has a function bound to the queue '{queue_name}'"})
+    return JSONResponse(content={"status": "accepted", "projects": accepted})
+
+@app.get("/_workers")
+async def workers():
+    """Process, address and restarts of every project worker"""
+    return supervisor.describe()
+
+@app.on_event("startup")
+async def startup_event():
+    log.info(f"Starting in Supervisor Mode with projects: {list(supervisor.workers)}")
+    await supervisor.start(timeout=float(os.getenv("SUPERVISOR_START_TIMEOUT", "60")))
+    log.info("Azure Functions Local Proxy started")
+    log.info(f"Access your functions in: http://localhost:{PORT}/api/Project.Function ou http://localhost:{PORT}/event/Project.Function")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await supervisor.stop()
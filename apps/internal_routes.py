@@ -0,0 +1,54 @@
+import metrics
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from profiler import ProfileStore
+from proxy.event_dispatcher import EventDispatcher
+from proxy.admission import AdmissionGate
+from local_queue import LocalQueue
+from memory_tracker import MemoryTracker
+
+router = APIRouter()
+
+@router.get("/_queues")
+async def event_queues():
+    """Depth and counters of the event dispatch queues"""
+    return EventDispatcher.stats()
+
+@router.get("/_admission")
+async def admission():
+    """Running, waiting and rejected HTTP requests of the concurrency limits of host.json and function.json"""
+    return AdmissionGate.stats()
+
+@router.get("/_local_queues")
+async def local_queues():
+    """Length, in-flight and counters of the local queues of queue triggered functions"""
+    return LocalQueue.stats()
+
+@router.get("/_memory")
+async def memory():
+    """RSS of the process and memory growth of each executor across hot reloads"""
+    return MemoryTracker.stats()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus metrics of invocations, reloads, file watcher and event queues"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/_profiles")
+async def list_profiles():
+    """Profiles kept in the ring buffer, most recent last"""
+    return ProfileStore.summary()
+
+@router.get("/_profiles/{profile_id}")
+async def get_profile(profile_id: str, format: str = "text"):
+    """A profile as a text report, a binary pstats dump (cpu only) or collapsed stacks for flamegraphs"""
+    profile = ProfileStore.get(profile_id)
+    if not profile or format not in profile:
+        return JSONResponse(status_code=404, content={"error": f"Profile '{profile_id}' with format '{format}' not found"})
+    if format == "pstats":
+        return Response(
+            profile["pstats"],
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'}
+        )
+    return PlainTextResponse(profile[format])
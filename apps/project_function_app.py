@@ -2,9 +2,20 @@ import os
 from fastapi import FastAPI, Request, BackgroundTasks
 from proxy.api_proxy import APIProxy
 from proxy.event_proxy import EventProxy
+from proxy.queue_proxy import QueueProxy
+from apps.internal_routes import router as internal_router
+from recorder import TrafficRecorder
 from environment import ProjectFunctionEnvironmentSetup
+import logger
+from logger import get_logger
+
+logger.setup()
+log = get_logger("project_function_app")
 
 app = FastAPI(title="Azure Functions Local Proxy")
+app.include_router(internal_router)
+if os.getenv("RECORD_TRAFFIC"):
+    app.add_middleware(TrafficRecorder)
 
 PROJECT = os.getenv("PROJECT")
 FUNCTION = os.getenv("FUNCTION")
@@ -22,14 +33,22 @@ async def proxy_event_function(request: Request, background_tasks: BackgroundTas
     function_path = f"{PROJECT_FUNCTION}"
     return await EventProxy(request, function_path, background_tasks=background_tasks).proxy_function()
 
+@app.api_route("/queue/{queue_name:path}", methods=["POST"])
+async def enqueue_queue_message(request: Request, queue_name: str):
+    """Endpoint for queueTrigger and serviceBusTrigger"""
+    return await QueueProxy(request, queue_name).enqueue()
+
 @app.on_event("startup")
 async def startup_event():
-    print(f"Starting in ProjectFunction Mode with {PROJECT_FUNCTION}")
+    log.info(f"Starting in ProjectFunction Mode with {PROJECT_FUNCTION}")
     settuper = ProjectFunctionEnvironmentSetup()
     settuper.setup_environment()
+    settuper.setup_function_registry()
     settuper.setup_executor()
+    settuper.setup_event_bus()
+    settuper.setup_local_queues()
     settuper.setup_file_watcher()
 
     port = int(os.getenv("PORT", 3000))
-    print("Azure Functions Local Proxy started")
-    print(f"Access your functions in: http://localhost:{port}/api ou http://localhost:{port}/event")
\ No newline at end of file
+    log.info("Azure Functions Local Proxy started")
+    log.info(f"Access your functions in: http://localhost:{port}/api ou http://localhost:{port}/event")
\ No newline at end of file
@@ -1,7 +1,41 @@
+import json
+import base64
 from azure.functions import EventGridEvent
 
+def is_cloud_event(event) -> bool:
+    """CloudEvents 1.0 events carry specversion; EventGrid ones do not."""
+    return isinstance(event, dict) and "specversion" in event
+
+def binary_cloud_event(headers, body: bytes) -> dict:
+    """CloudEvents binary mode: the attributes come in ce-* headers and the body is the data."""
+    event = {name[3:]: value for name, value in headers.items() if name.lower().startswith("ce-")}
+    content_type = headers.get("content-type", "")
+    if content_type:
+        event["datacontenttype"] = content_type
+    if "json" in content_type:
+        event["data"] = json.loads(body) if body else None
+    else:
+        event["data_base64"] = base64.b64encode(body).decode("ascii")
+    return event
+
 class EventRequest(EventGridEvent):
     def __init__(self, body: dict):
+        self._payload = body
+        if is_cloud_event(body):
+            # Same mapping of the Azure Python worker: source is the topic and type the event type
+            data = body.get("data")
+            if "data_base64" in body:
+                data = base64.b64decode(body["data_base64"])
+            super().__init__(
+                id=body.get("id"),
+                data=data,
+                topic=body.get("source"),
+                subject=body.get("subject"),
+                event_type=body.get("type"),
+                event_time=body.get("time"),
+                data_version=body.get("dataschema")
+            )
+            return
         super().__init__(
             id=body.get("id"),
             data=body.get("data"),
@@ -10,4 +44,8 @@ class EventRequest(EventGridEvent):
             event_type=body.get("eventType"),
             event_time=body.get("eventTime"),
             data_version=body.get("dataVersion")
-        )
\ No newline at end of file
+        )
+
+    def to_payload(self) -> dict:
+        """Picklable representation used to send the event to a worker process."""
+        return self._payload
@@ -1,40 +1,23 @@
 import re
 import json
-from typing import Dict, Any
+import mmap
+from typing import Dict, Any, Optional, Union
 from fastapi import Request
 import azure.functions as func
 
-def transform_url(url: str) -> str:
-    pattern = re.compile(r'(https?://)?([^/]+)/(api)/([^/]+)\.([^/]+)/')
-    return re.sub(pattern, r'\1\2/\3/', url)
+PROJECT_FUNCTION_PREFIX = re.compile(r'(https?://)?([^/]+)/(api)/([^/]+)\.([^/]+)/')
 
-def extract_params(mask: str, url: str) -> dict:
-    # Extraindo os nomes dos parâmetros
-    mask_parts = mask.split('/')
-    param_names = [part.strip('{}') for part in mask_parts if part.startswith('{') and part.endswith('}')]
-    
-    # Removendo query parameters
-    url_base = url.split('?')[0]
-    
-    # Separando os segmentos da URL
-    url_parts = url_base.split('/')
-    
-    # Encontrando o ponto de início dos parâmetros na URL
-    start_index = next((i for i, part in enumerate(url_parts) if part in mask_parts), len(url_parts) - len(param_names))
-    
-    # Pegando os valores correspondentes aos parâmetros
-    param_values = url_parts[start_index:start_index + len(param_names)]
-    
-    return dict(zip(param_names, param_values))
+def transform_url(url: str) -> str:
+    return PROJECT_FUNCTION_PREFIX.sub(r'\1\2/\3/', url)
 
 class AzureHttpRequest(func.HttpRequest):
-    def __init__(self, request: Request, body: bytes, func_info=None):
+    def __init__(self, request: Request, body: Union[bytes, mmap.mmap], func_info=None, route_params: Dict[str, str] = None, body_path: Optional[str] = None):
         self._request = request
-        self._body = body
-        self._body_bytes = body
+        self._body = body  # bytes, ou um mmap somente leitura quando o corpo foi para um arquivo temporário
+        self._body_path = body_path
         self._params = {}
         self._headers = {}
-        self._route_params = {}
+        self._route_params = route_params or {}  # Resolvidos pela RouteTable
         self._func_info = func_info  # Adiciona o func_info para processar o route
         self._url = str(self._request.url)  # Inicializa a URL original
 
@@ -42,18 +25,11 @@ class AzureHttpRequest(func.HttpRequest):
         """Config Azure request from fastapi."""
         self._params = dict(self._request.query_params)
         self._headers = dict(self._request.headers)
-        if not self._body:
-            self._body = await self._request.body()
-            self._body_bytes = self._body
 
         # process URL prefix /api/{func_info.project}.{func_info.function_name} if exists
         if self._func_info:
             self._url = transform_url(self._url)
 
-            # Process route_params if route is defined
-            if self._func_info.route:
-                self._route_params = extract_params(self._func_info.route, self._url)
-
     @property
     def method(self) -> str:
         return self._request.method
@@ -75,8 +51,29 @@ class AzureHttpRequest(func.HttpRequest):
         return self._route_params
 
     @property
-    def body(self) -> bytes:
+    def body(self) -> Union[bytes, mmap.mmap]:
+        return self._body
+
+    def get_body(self) -> Union[bytes, mmap.mmap]:
+        """The body without copies: bytes, or a read-only mmap (bytes-like, sliceable, file-like) for spooled bodies."""
         return self._body
     
     def get_json(self) -> Any:
-        return json.loads(self._body.decode('utf-8'))
\ No newline at end of file
+        if isinstance(self._body, mmap.mmap):
+            return json.loads(self._body[:])
+        return json.loads(self._body.decode('utf-8'))
+
+    def to_payload(self) -> dict:
+        """Picklable representation used to send the request to a worker process."""
+        payload = {
+            "method": self.method,
+            "url": self.url,
+            "headers": self.headers,
+            "params": self.params,
+            "route_params": self.route_params,
+            "body": self._body
+        }
+        if self._body_path:
+            # O worker lê o arquivo temporário em vez de receber o corpo pelo pipe
+            payload.update(body=b"", body_path=self._body_path)
+        return payload
\ No newline at end of file
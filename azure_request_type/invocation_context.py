@@ -0,0 +1,83 @@
+import os
+import azure.functions as func
+from typing import Dict, Optional
+from logger import new_invocation_id, thread_local
+
+class LocalTraceContext:
+    """W3C trace context of the request (traceparent/tracestate headers)."""
+
+    def __init__(self, trace_parent: str = "", trace_state: str = ""):
+        self.trace_parent = trace_parent
+        self.trace_state = trace_state
+        self.attributes: Dict[str, str] = {}
+
+class LocalRetryContext:
+    def __init__(self, retry_count: int = 0, max_retry_count: int = 0):
+        self.retry_count = retry_count
+        self.max_retry_count = max_retry_count
+        self.exception = None
+
+class InvocationContext(func.Context):
+    """`context` argument of main, like the one the Azure host passes."""
+
+    def __init__(self, invocation_id: str, function_name: str, function_directory: str,
+                 trace_parent: str = "", trace_state: str = "", retry_count: int = 0, max_retry_count: int = 0):
+        self._invocation_id = invocation_id
+        self._function_name = function_name
+        self._function_directory = function_directory
+        self._trace_context = LocalTraceContext(trace_parent, trace_state)
+        self._retry_context = LocalRetryContext(retry_count, max_retry_count)
+
+    @classmethod
+    def create(cls, func_info, headers: Optional[dict] = None, **retry) -> "InvocationContext":
+        headers = headers or {}
+        return cls(
+            new_invocation_id(),
+            func_info.function_name,
+            func_info.function_dir,
+            trace_parent=headers.get("traceparent", ""),
+            trace_state=headers.get("tracestate", ""),
+            **retry
+        )
+
+    @property
+    def invocation_id(self) -> str:
+        return self._invocation_id
+
+    @property
+    def thread_local_storage(self):
+        """Set `invocation_id` on it inside threads started by main to tag their logs with the invocation."""
+        return thread_local
+
+    @property
+    def function_name(self) -> str:
+        return self._function_name
+
+    @property
+    def function_directory(self) -> str:
+        return self._function_directory
+
+    @property
+    def trace_context(self) -> LocalTraceContext:
+        return self._trace_context
+
+    @property
+    def retry_context(self) -> LocalRetryContext:
+        return self._retry_context
+
+    @property
+    def log_name(self) -> str:
+        """Project.Function shown in the logs."""
+        return f"{os.path.basename(os.path.dirname(self._function_directory))}.{self._function_name}"
+
+    def to_payload(self) -> dict:
+        """Picklable representation used to send the context to a worker process."""
+        return {
+            "invocation_id": self._invocation_id,
+            "function_name": self._function_name,
+            "function_directory": self._function_directory,
+            "trace_parent": self._trace_context.trace_parent,
+            "trace_state": self._trace_context.trace_state,
+            "retry_count": self._retry_context.retry_count,
+            "max_retry_count": self._retry_context.max_retry_count
+        }
@@ -0,0 +1,48 @@
+import datetime
+from azure.functions.queue import QueueMessage
+from azure.functions.servicebus import ServiceBusMessage
+
+def _utc(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc) if timestamp else None
+
+class QueueRequest(QueueMessage):
+    """Message of a local queue delivered to a queueTrigger function."""
+
+    def __init__(self, payload: dict):
+        self._payload = payload
+        super().__init__(
+            id=payload["id"],
+            body=payload["body"],
+            dequeue_count=payload["dequeue_count"],
+            insertion_time=_utc(payload["insertion_time"]),
+            expiration_time=_utc(payload["insertion_time"] + 7 * 24 * 3600),  # TTL padrão do Azure Storage
+            time_next_visible=_utc(payload.get("time_next_visible")),
+            pop_receipt=payload["id"]
+        )
+
+    def to_payload(self) -> dict:
+        """Picklable representation used to send the message to a worker process."""
+        return self._payload
+
+class ServiceBusRequest(ServiceBusMessage):
+    """Message of a local queue delivered to a serviceBusTrigger function."""
+
+    def __init__(self, payload: dict):
+        self._payload = payload
+        body = payload["body"]
+        super().__init__(
+            body=body.encode() if isinstance(body, str) else body,
+            message_id=payload["id"],
+            delivery_count=payload["dequeue_count"],
+            enqueued_time_utc=_utc(payload["insertion_time"]),
+            lock_token=payload["id"],
+            user_properties={}
+        )
+
+    def to_payload(self) -> dict:
+        return self._payload
+
+def build_queue_request(payload: dict):
+    if payload.get("trigger") == "servicebustrigger":
+        return ServiceBusRequest(payload)
+    return QueueRequest(payload)
@@ -0,0 +1,62 @@
+import os
+import mmap
+import tempfile
+from typing import Optional, Union
+from fastapi import Request
+
+def spool_threshold() -> int:
+    """Bodies bigger than this many bytes are written to a temporary file (REQUEST_BODY_SPOOL_THRESHOLD)."""
+    return int(os.getenv("REQUEST_BODY_SPOOL_THRESHOLD", str(8 * 1024 * 1024)))
+
+class SpooledBody:
+    """Request body read from the ASGI stream once: in memory when small, in a temp file mapped with mmap when large."""
+
+    def __init__(self):
+        self.data: Union[bytes, mmap.mmap] = b""
+        self.file = None
+        self.size = 0
+
+    @classmethod
+    async def from_request(cls, request: Request, threshold: Optional[int] = None) -> "SpooledBody":
+        threshold = spool_threshold() if threshold is None else threshold
+        body = cls()
+        chunks = []
+        async for chunk in request.stream():
+            if not chunk:
+                continue
+            body.size += len(chunk)
+            if body.file is not None:
+                body.file.write(chunk)
+                continue
+            chunks.append(chunk)
+            if body.size > threshold:
+                body.file = tempfile.NamedTemporaryFile(prefix="localrunner-body-")
+                body.file.writelines(chunks)
+                chunks = []
+
+        if body.file is None:
+            body.data = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+        else:
+            body.file.flush()
+            body.data = mmap.mmap(body.file.fileno(), 0, access=mmap.ACCESS_READ)
+        return body
+
+    @property
+    def is_spooled(self) -> bool:
+        return self.file is not None
+
+    @property
+    def path(self) -> Optional[str]:
+        return self.file.name if self.file is not None else None
+
+    def close(self):
+        """Release the mapping and delete the temporary file."""
+        if self.file is None:
+            return
+        try:
+            self.data.close()
+        except BufferError:
+            pass  # Ainda há memoryviews do corpo vivas; o mmap é liberado pelo GC
+        self.file.close()
+        self.file = None
+        self.data = b""
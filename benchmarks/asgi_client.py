@@ -0,0 +1,74 @@
+import json
+import asyncio
+from typing import Dict, Optional, Tuple
+
+class ASGIClient:
+    """Minimal in-process ASGI driver: no sockets, so the numbers measure the proxy and not the HTTP stack."""
+
+    def __init__(self, app):
+        self.app = app
+        self.lifespan_queue = None
+        self.lifespan_events = None
+        self.lifespan_task = None
+
+    async def startup(self):
+        self.lifespan_queue = asyncio.Queue()
+        self.lifespan_events = asyncio.Queue()
+        scope = {"type": "lifespan", "asgi": {"version": "3.0"}}
+        self.lifespan_task = asyncio.create_task(self.app(scope, self.lifespan_queue.get, self.lifespan_events.put))
+        await self.lifespan_queue.put({"type": "lifespan.startup"})
+        message = await self.lifespan_events.get()
+        if message["type"] != "lifespan.startup.complete":
+            raise RuntimeError(f"Application startup failed: {message.get('message')}")
+
+    async def shutdown(self):
+        if self.lifespan_task is None:
+            return
+        await self.lifespan_queue.put({"type": "lifespan.shutdown"})
+        await self.lifespan_events.get()
+        await self.lifespan_task
+
+    async def request(self, method: str, path: str, body: bytes = b"", headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        path, _, query = path.partition("?")
+        raw_headers = [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()]
+        raw_headers.append((b"content-length", str(len(body)).encode()))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": raw_headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("localhost", 3000),
+        }
+
+        sent = False
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await asyncio.Event().wait()  # Nunca desconecta durante a resposta
+
+        response = {"status": None, "headers": {}, "body": []}
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = {key.decode(): value.decode() for key, value in message.get("headers", [])}
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return response["status"], response["headers"], b"".join(response["body"])
+
+    async def get_json(self, path: str):
+        _, _, body = await self.request("GET", path)
+        return json.loads(body)
+
+    async def post_json(self, path: str, payload, headers: Optional[Dict[str, str]] = None):
+        return await self.request("POST", path, json.dumps(payload).encode(), {"content-type": "application/json", **(headers or {})})
@@ -0,0 +1,237 @@
+"""Replay traffic recorded with RECORD_TRAFFIC against a running LocalRunner and compare the responses.
+
+    python benchmarks/replay.py traffic.jsonl                       # original pacing
+    python benchmarks/replay.py traffic.jsonl --speed 4             # original pacing, 4x faster
+    python benchmarks/replay.py traffic.jsonl --rps 200 --concurrency 16
+    python benchmarks/replay.py traffic.jsonl --max --target http://localhost:3001
+"""
+import sys
+import json
+import time
+import difflib
+import hashlib
+import argparse
+import threading
+import http.client
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+from scenario import percentile
+from workspace import REPO_DIR
+
+sys.path.insert(0, REPO_DIR)
+from recorder import decode_body  # noqa: E402
+
+# Cabeçalhos que dependem da conexão original e são recalculados no replay
+SKIPPED_HEADERS = {"host", "content-length", "connection", "keep-alive", "transfer-encoding", "te", "upgrade"}
+
+def load_records(path: str, path_filter: str = "", limit: int = 0):
+    """Recorded requests in order, skipping the ones whose body was too big to be recorded."""
+    records, skipped = [], 0
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if path_filter and path_filter not in record["path"]:
+                continue
+            if record.get("body_truncated"):
+                skipped += 1
+                continue
+            records.append(record)
+            if limit and len(records) >= limit:
+                break
+    records.sort(key=lambda record: record["started_at"])
+    return records, skipped
+
+def schedule(records, args):
+    """Offset in seconds of each request from the start of the replay."""
+    if args.max:
+        return [0.0] * len(records)
+    if args.rps:
+        return [index / args.rps for index in range(len(records))]
+    first = records[0]["started_at"] if records else 0
+    return [(record["started_at"] - first) / args.speed for record in records]
+
+def endpoint_of(record) -> str:
+    """/api/Project.Function or /event/Project.Function, used to group the latencies."""
+    parts = [part for part in record["path"].split("/") if part]
+    return f"{record['method']} /{'/'.join(parts[:2])}"
+
+class Replayer:
+    def __init__(self, target: str, timeout: float):
+        url = urlsplit(target)
+        self.scheme = url.scheme or "http"
+        self.host = url.hostname or "localhost"
+        self.port = url.port or (443 if self.scheme == "https" else 80)
+        self.timeout = timeout
+        self.local = threading.local()  # Uma conexão keep-alive por thread
+
+    def connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            connection = self.local.connection = connection_class(self.host, self.port, timeout=self.timeout)
+        return connection
+
+    def send(self, record, scheduled_at: float) -> dict:
+        headers = {name: value for name, value in record["headers"] if name.lower() not in SKIPPED_HEADERS}
+        target = record["path"] + (f"?{record['query']}" if record.get("query") else "")
+        body = decode_body(record)
+        lag = time.perf_counter() - scheduled_at
+
+        for attempt in range(2):
+            start = time.perf_counter()
+            connection = self.connection()
+            try:
+                connection.request(record["method"], target, body=body or None, headers=headers)
+                response = connection.getresponse()
+                content = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+                connection.close()
+                self.local.connection = None
+                if attempt:
+                    return {"error": str(e), "latency_ms": (time.perf_counter() - start) * 1000, "lag_ms": lag * 1000}
+                continue  # A conexão ociosa foi fechada pelo servidor; tenta com uma nova
+            except OSError as e:
+                connection.close()
+                self.local.connection = None
+                return {"error": str(e), "latency_ms": (time.perf_counter() - start) * 1000, "lag_ms": lag * 1000}
+
+            if response.will_close:
+                connection.close()
+                self.local.connection = None
+            return {
+                "status": response.status,
+                "body": content,
+                "latency_ms": (time.perf_counter() - start) * 1000,
+                "lag_ms": lag * 1000
+            }
+
+def body_diff(record, result, max_lines: int = 20) -> list:
+    """Unified diff of the recorded and replayed bodies, when both are text."""
+    expected = record["response"]
+    if expected.get("body_truncated") or expected.get("body_encoding") == "base64":
+        return [f"sha256 {expected['sha256'][:12]} != {hashlib.sha256(result['body']).hexdigest()[:12]}"]
+    try:
+        actual = result["body"].decode("utf-8")
+    except UnicodeDecodeError:
+        return ["binary body differs"]
+    lines = difflib.unified_diff(
+        expected["body"].splitlines(), actual.splitlines(), "recorded", "replayed", lineterm="", n=1
+    )
+    return list(lines)[:max_lines]
+
+def compare(record, result, compare_bodies: bool) -> list:
+    """Differences between the recorded response and the replayed one."""
+    if "error" in result:
+        return [f"request failed: {result['error']}"]
+    expected = record["response"]
+    differences = []
+    if result["status"] != expected["status"]:
+        differences.append(f"status {expected['status']} != {result['status']}")
+    if compare_bodies and hashlib.sha256(result["body"]).hexdigest() != expected["sha256"]:
+        differences.extend(body_diff(record, result))
+    return differences
+
+def summarize(records, results, elapsed: float) -> dict:
+    latencies = [result["latency_ms"] for result in results]
+    groups = {}
+    for record, result in zip(records, results):
+        groups.setdefault(endpoint_of(record), []).append(result)
+
+    def stats(items):
+        values = [item["latency_ms"] for item in items]
+        return {
+            "requests": len(items),
+            "errors": sum(1 for item in items if "error" in item or item["status"] >= 500),
+            "latency_p50_ms": round(percentile(values, 0.50), 2),
+            "latency_p90_ms": round(percentile(values, 0.90), 2),
+            "latency_p99_ms": round(percentile(values, 0.99), 2),
+            "latency_max_ms": round(max(values, default=0.0), 2),
+        }
+
+    return {
+        **stats(results),
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "schedule_lag_p99_ms": round(percentile([result["lag_ms"] for result in results], 0.99), 2),
+        "endpoints": {endpoint: stats(items) for endpoint, items in sorted(groups.items())},
+    }
+
+def print_report(summary: dict, diffs: list, diff_limit: int):
+    print(f"\n{'endpoint':<48} {'requests':>8} {'errors':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for endpoint, stats in summary["endpoints"].items():
+        print(
+            f"{endpoint[:48]:<48} {stats['requests']:>8} {stats['errors']:>6} {stats['latency_p50_ms']:>9} "
+            f"{stats['latency_p90_ms']:>9} {stats['latency_p99_ms']:>9} {stats['latency_max_ms']:>9}"
+        )
+    print(
+        f"\n{summary['requests']} requests in {summary['elapsed_s']}s ({summary['requests_per_second']} req/s), "
+        f"p50 {summary['latency_p50_ms']}ms, p99 {summary['latency_p99_ms']}ms, {summary['errors']} errors, "
+        f"schedule lag p99 {summary['schedule_lag_p99_ms']}ms"
+    )
+    print(f"{len(diffs)} response(s) differ from the recording")
+    for record, differences in diffs[:diff_limit]:
+        print(f"\n{record['method']} {record['path']}{'?' + record['query'] if record.get('query') else ''}")
+        for line in differences:
+            print(f"  {line}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording", help="JSONL file written with RECORD_TRAFFIC")
+    parser.add_argument("--target", default="http://localhost:3000", help="Base URL of the LocalRunner to replay against")
+    pacing = parser.add_mutually_exclusive_group()
+    pacing.add_argument("--speed", type=float, default=1.0, help="Original pacing divided by this factor")
+    pacing.add_argument("--rps", type=float, help="Fixed rate of requests per second")
+    pacing.add_argument("--max", action="store_true", help="As fast as the concurrency allows")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at the same time")
+    parser.add_argument("--filter", default="", help="Only replay paths containing this text")
+    parser.add_argument("--limit", type=int, default=0, help="Replay at most this many requests")
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds allowed for each request")
+    parser.add_argument("--status-only", action="store_true", help="Compare only the status codes, not the bodies")
+    parser.add_argument("--diff-limit", type=int, default=10, help="Differences printed")
+    parser.add_argument("--output", help="Write the summary as JSON to this file")
+    parser.add_argument("--fail-on-diff", action="store_true")
+    args = parser.parse_args()
+
+    records, skipped = load_records(args.recording, args.filter, args.limit)
+    if skipped:
+        print(f"Skipping {skipped} requests whose body exceeded RECORD_TRAFFIC_MAX_BODY")
+    if not records:
+        print("Nothing to replay")
+        return
+
+    offsets = schedule(records, args)
+    replayer = Replayer(args.target, args.timeout)
+    print(f"Replaying {len(records)} requests against {args.target}...")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = []
+        for record, offset in zip(records, offsets):
+            scheduled_at = start + offset
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(replayer.send, record, scheduled_at))
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    diffs = []
+    for record, result in zip(records, results):
+        differences = compare(record, result, not args.status_only)
+        if differences:
+            diffs.append((record, differences))
+
+    summary = summarize(records, results, elapsed)
+    summary["differences"] = len(diffs)
+    print_report(summary, diffs, args.diff_limit)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(summary, file, indent=2)
+
+    if diffs and args.fail_on_diff:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Benchmark LocalRunner on a synthetic workspace and compare the results with a saved baseline.
+
+    python benchmarks/run.py                      # run and compare with benchmarks/baseline.json
+    python benchmarks/run.py --save               # run and store the results as the new baseline
+    python benchmarks/run.py --modes dynamic --projects 20 --functions 50
+"""
+import os
+import sys
+import json
+import argparse
+import platform
+import subprocess
+import tempfile
+
+from workspace import REPO_DIR, create_workspace, remove_workspace
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARKS_DIR, "baseline.json")
+
+# Métricas comparadas com o baseline: True quando um valor maior é melhor
+METRICS = {
+    "startup_ms": False,
+    "cold_start_ms": False,
+    "requests_per_second": True,
+    "latency_p50_ms": False,
+    "latency_p99_ms": False,
+    "events_per_second": True,
+    "queue_messages_per_second": True,
+    "hot_reload_p50_ms": False,
+    "hot_reload_max_ms": False,
+}
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def run_mode(mode: str, workspace: str, args) -> dict:
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as output:
+        output_path = output.name
+    command = [
+        sys.executable, os.path.join(BENCHMARKS_DIR, "scenario.py"),
+        "--mode", mode,
+        "--workspace", workspace,
+        "--output", output_path,
+        "--functions", str(args.functions),
+        "--requests", str(args.requests),
+        "--concurrency", str(args.concurrency),
+        "--events", str(args.events),
+        "--batch-size", str(args.batch_size),
+        "--reloads", str(args.reloads),
+    ]
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1", "EXECUTION_MODE": args.execution_mode}
+    log = None if args.verbose else subprocess.DEVNULL
+    try:
+        completed = subprocess.run(command, env=env, stdout=log, stderr=log, timeout=args.timeout)
+        if completed.returncode != 0:
+            raise RuntimeError(f"Benchmark of {mode} mode failed with exit code {completed.returncode} (run with --verbose)")
+        with open(output_path) as file:
+            return json.load(file)
+    finally:
+        os.remove(output_path)
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """Rows of (mode, metric, baseline, current, change, regression) for every metric present in both runs."""
+    rows = []
+    for mode, results in current["modes"].items():
+        previous = baseline.get("modes", {}).get(mode, {})
+        for metric, higher_is_better in METRICS.items():
+            if metric not in results or not previous.get(metric):
+                continue
+            change = (results[metric] - previous[metric]) / previous[metric]
+            worse = -change if higher_is_better else change
+            rows.append((mode, metric, previous[metric], results[metric], change, worse > threshold))
+    return rows
+
+def print_results(current: dict):
+    for mode, results in current["modes"].items():
+        print(f"\n[{mode}]")
+        for metric, value in results.items():
+            print(f"  {metric:<26} {value}")
+
+def print_comparison(rows: list, threshold: float):
+    print(f"\n{'mode':<10} {'metric':<26} {'baseline':>12} {'current':>12} {'change':>9}")
+    for mode, metric, previous, value, change, regression in rows:
+        flag = "  REGRESSION" if regression else ""
+        print(f"{mode:<10} {metric:<26} {previous:>12} {value:>12} {change:>+8.1%}{flag}")
+    regressions = sum(1 for row in rows if row[-1])
+    print(f"\n{regressions} regression(s) above {threshold:.0%}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="dynamic,project,function", help="Comma separated: dynamic, project, function")
+    parser.add_argument("--execution-mode", default=os.getenv("EXECUTION_MODE", "inline"), choices=("inline", "thread", "process", "zygote"))
+    parser.add_argument("--projects", type=int, default=5)
+    parser.add_argument("--functions", type=int, default=10, help="HTTP and EventGrid functions per project (M of each)")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--reloads", type=int, default=5)
+    parser.add_argument("--timeout", type=int, default=600, help="Seconds allowed for each mode")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--output", help="Also write the results of this run to this file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="Show the logs of the application")
+    args = parser.parse_args()
+
+    current = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            key: getattr(args, key)
+            for key in ("execution_mode", "projects", "functions", "requests", "concurrency", "events", "batch_size", "reloads")
+        },
+        "modes": {}
+    }
+
+    workspace = create_workspace(args.projects, args.functions)
+    try:
+        for mode in [mode.strip() for mode in args.modes.split(",") if mode.strip()]:
+            print(f"Benchmarking {mode} mode...")
+            current["modes"][mode] = run_mode(mode, workspace, args)
+    finally:
+        remove_workspace(workspace)
+
+    print_results(current)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(current, file, indent=2)
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if baseline.get("parameters") != current["parameters"]:
+            print(f"\nWarning: baseline {baseline.get('revision')} was run with {baseline.get('parameters')}")
+        rows = compare(baseline, current, args.threshold)
+        print_comparison(rows, args.threshold)
+        regressions = [row for row in rows if row[-1]]
+
+    if args.save:
+        with open(args.baseline, "w") as file:
+            json.dump(current, file, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Benchmark of one run mode, executed in a fresh interpreter by benchmarks/run.py.
+
+The apps read PROJECT/FUNCTION at import time and keep class-level state (registry,
+executor pool, dispatchers), so every mode needs its own process.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import shutil
+import argparse
+import tempfile
+import importlib
+
+from asgi_client import ASGIClient
+from workspace import QUEUE_NAME, REPO_DIR, event_function_name, http_function_name, project_name, write_http_function
+
+APPS = {
+    "dynamic": "apps.dynamic_app",
+    "project": "apps.project_app",
+    "function": "apps.project_function_app",
+}
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+class Scenario:
+    def __init__(self, mode: str, workspace: str, functions: int):
+        self.mode = mode
+        self.workspace = workspace
+        self.functions = functions if mode != "function" else 1
+        self.project = project_name(0)
+
+    def http_path(self, index: int) -> str:
+        function = http_function_name(index % self.functions)
+        if self.mode == "dynamic":
+            return f"/api/{self.project}.{function}/items/{index}"
+        if self.mode == "project":
+            return f"/api/{function}/items/{index}"
+        return f"/api/items/{index}"
+
+    def event_path(self) -> str:
+        if self.mode == "dynamic":
+            return f"/event/{self.project}.{event_function_name(0)}"
+        if self.mode == "project":
+            return f"/event/{event_function_name(0)}"
+        return None  # ProjectFunction mode serves a single HTTP function
+
+    async def cold_start(self, started: float) -> dict:
+        app = importlib.import_module(APPS[self.mode]).app
+        self.client = ASGIClient(app)
+        await self.client.startup()
+        startup_ms = (time.perf_counter() - started) * 1000
+        status, _, body = await self.client.request("GET", self.http_path(0))
+        if status != 200:
+            raise RuntimeError(f"First request failed with {status}: {body[:200]}")
+        return {
+            "startup_ms": round(startup_ms, 2),
+            "cold_start_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    async def throughput(self, requests: int, concurrency: int) -> dict:
+        # Aquece todas as funções antes de medir
+        for index in range(self.functions):
+            await self.client.request("GET", self.http_path(index))
+
+        latencies, errors = [], 0
+        counter = iter(range(requests))
+
+        async def worker():
+            nonlocal errors
+            for index in counter:
+                start = time.perf_counter()
+                status, _, _ = await self.client.request("GET", self.http_path(index))
+                latencies.append((time.perf_counter() - start) * 1000)
+                errors += status != 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        return {
+            "requests_per_second": round(requests / elapsed, 2),
+            "latency_p50_ms": round(percentile(latencies, 0.50), 3),
+            "latency_p99_ms": round(percentile(latencies, 0.99), 3),
+            "http_errors": errors
+        }
+
+    async def hot_reload(self, reloads: int, timeout: float = 15.0) -> dict:
+        """Time from rewriting a function file until the new code answers."""
+        function = http_function_name(0)
+        samples = []
+        for attempt in range(1, reloads + 1):
+            # A versão muda de tamanho a cada escrita para nunca coincidir com um .pyc antigo
+            version = f"v{attempt}-" + "x" * attempt
+            await asyncio.sleep(0.2)  # Separa os eventos do file watcher entre tentativas
+            start = time.perf_counter()
+            write_http_function(self.workspace, self.project, function, version)
+            while True:
+                _, _, body = await self.client.request("GET", self.http_path(0))
+                if body.startswith(version.encode()):
+                    samples.append((time.perf_counter() - start) * 1000)
+                    break
+                if time.perf_counter() - start > timeout:
+                    raise RuntimeError(f"New code of {function} was not served after {timeout}s")
+                await asyncio.sleep(0.005)
+        return {
+            "hot_reload_p50_ms": round(percentile(samples, 0.50), 2),
+            "hot_reload_max_ms": round(max(samples), 2)
+        }
+
+    async def event_batches(self, events: int, batch_size: int, timeout: float = 120.0) -> dict:
+        path = self.event_path()
+        if path is None:
+            return {}
+        key = f"{self.project}.{event_function_name(0)}"
+        status, _, body = await self.client.post_json(path, [{"id": "warmup", "data": {}}], {"sync": "true"})
+        if status != 200:
+            raise RuntimeError(f"Event warmup failed with {status}: {body[:200]}")
+
+        start = time.perf_counter()
+        sent, rejected = 0, 0
+        while sent < events:
+            batch = [{"id": str(sent + index), "data": {}} for index in range(min(batch_size, events - sent))]
+            status, headers, _ = await self.client.post_json(path, batch)
+            if status == 429:
+                rejected += 1
+                await asyncio.sleep(0.01)
+                continue
+            sent += len(batch)
+
+        while True:
+            queue = (await self.client.get_json("/_queues")).get(key, {})
+            if queue.get("processed", 0) >= events:
+                break
+            if time.perf_counter() - start > timeout:
+                raise RuntimeError(f"Only {queue.get('processed', 0)} of {events} events processed after {timeout}s")
+            await asyncio.sleep(0.005)
+        elapsed = time.perf_counter() - start
+        return {
+            "events_per_second": round(events / elapsed, 2),
+            "event_batches_rejected": rejected,
+            "event_failures": queue.get("failed", 0) + queue.get("timed_out", 0)
+        }
+
+    async def queue_drain(self, messages: int, batch_size: int, timeout: float = 120.0) -> dict:
+        """Time to spool and consume the messages of a local queue (queueTrigger)."""
+        if self.mode == "function":
+            return {}
+        start = time.perf_counter()
+        for offset in range(0, messages, batch_size):
+            batch = [f"message-{index}" for index in range(offset, min(offset + batch_size, messages))]
+            status, _, body = await self.client.post_json(f"/queue/{QUEUE_NAME}", batch)
+            if status != 200:
+                raise RuntimeError(f"Enqueue failed with {status}: {body[:200]}")
+
+        while True:
+            queue = (await self.client.get_json("/_local_queues")).get(QUEUE_NAME, {})
+            if queue.get("completed", 0) + queue.get("poisoned", 0) >= messages:
+                break
+            if time.perf_counter() - start > timeout:
+                raise RuntimeError(f"Only {queue.get('completed', 0)} of {messages} queue messages processed after {timeout}s")
+            await asyncio.sleep(0.005)
+        elapsed = time.perf_counter() - start
+        return {
+            "queue_messages_per_second": round(messages / elapsed, 2),
+            "queue_failures": queue.get("failed", 0) + queue.get("poisoned", 0)
+        }
+
+async def run(args, started: float) -> dict:
+    scenario = Scenario(args.mode, args.workspace, args.functions)
+    result = await scenario.cold_start(started)
+    result.update(await scenario.throughput(args.requests, args.concurrency))
+    result.update(await scenario.event_batches(args.events, args.batch_size))
+    result.update(await scenario.queue_drain(args.events, args.batch_size))
+    result.update(await scenario.hot_reload(args.reloads))
+    await scenario.client.shutdown()
+    return result
+
+def main():
+    started = time.perf_counter()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=APPS, required=True)
+    parser.add_argument("--workspace", required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--functions", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--reloads", type=int, default=5)
+    args = parser.parse_args()
+
+    os.chdir(args.workspace)
+    sys.path[:0] = [REPO_DIR, args.workspace]
+    if args.mode in ("project", "function"):
+        os.environ["PROJECT"] = project_name(0)
+    if args.mode == "function":
+        os.environ["FUNCTION"] = http_function_name(0)
+
+    queue_dir = os.environ["LOCAL_QUEUE_DIR"] = tempfile.mkdtemp(prefix="localrunner-bench-queues-")
+    result = asyncio.run(run(args, started))
+    with open(args.output, "w") as file:
+        json.dump(result, file)
+    shutil.rmtree(queue_dir, ignore_errors=True)
+    sys.stdout.flush()
+    os._exit(0)  # Não espera o file watcher nem os workers em modo process
+
+if __name__ == "__main__":
+    main()
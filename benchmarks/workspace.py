@@ -0,0 +1,97 @@
+import os
+import json
+import shutil
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HTTP_FUNCTION = '''import azure.functions as func
+from SharedLibraries.bench_shared import render
+
+VERSION = "{version}"
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    return func.HttpResponse(render(VERSION, req.route_params.get("id")), status_code=200)
+'''
+
+EVENT_FUNCTION = '''import azure.functions as func
+from SharedLibraries.bench_shared import render
+
+def main(event: func.EventGridEvent):
+    render("event", event.id)
+'''
+
+QUEUE_FUNCTION = '''import azure.functions as func
+from SharedLibraries.bench_shared import render
+
+def main(msg: func.QueueMessage):
+    render("queue", msg.get_body())
+'''
+
+QUEUE_NAME = "bench-queue"
+
+SHARED_LIBRARY = '''def render(version, value):
+    return f"{version}:{value}"
+'''
+
+def http_function_name(index: int) -> str:
+    return f"Http{index}"
+
+def event_function_name(index: int) -> str:
+    return f"Event{index}"
+
+def queue_function_name() -> str:
+    return "Queue0"
+
+def project_name(index: int) -> str:
+    return f"BenchProject{index}"
+
+def _write(path: str, content: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(content)
+
+def write_http_function(workspace: str, project: str, function: str, version: str = "v0"):
+    """(Re)write the code of a synthetic HTTP function; used to trigger hot reloads."""
+    _write(os.path.join(workspace, project, function, "__init__.py"), HTTP_FUNCTION.format(version=version))
+
+def create_workspace(projects: int, functions: int, base_dir: str = None) -> str:
+    """Workspace with N projects x M functions (HTTP and EventGrid) plus a queue function in the first project, laid out like a real one next to LocalRunner."""
+    workspace = tempfile.mkdtemp(prefix="localrunner-bench-", dir=base_dir)
+    os.symlink(REPO_DIR, os.path.join(workspace, "LocalRunner"))
+    _write(os.path.join(workspace, "SharedLibraries", "__init__.py"), "")
+    _write(os.path.join(workspace, "SharedLibraries", "bench_shared.py"), SHARED_LIBRARY)
+
+    http_binding = {
+        "scriptFile": "__init__.py",
+        "bindings": [
+            {"authLevel": "anonymous", "type": "httpTrigger", "direction": "in", "name": "req", "methods": ["get", "post"], "route": "items/{id:int}"},
+            {"type": "http", "direction": "out", "name": "$return"}
+        ]
+    }
+    event_binding = {
+        "scriptFile": "__init__.py",
+        "bindings": [{"type": "eventGridTrigger", "direction": "in", "name": "event"}]
+    }
+    queue_binding = {
+        "scriptFile": "__init__.py",
+        "bindings": [{"type": "queueTrigger", "direction": "in", "name": "msg", "queueName": QUEUE_NAME}]
+    }
+    queue_function = os.path.join(workspace, project_name(0), queue_function_name())
+    _write(os.path.join(queue_function, "function.json"), json.dumps(queue_binding))
+    _write(os.path.join(queue_function, "__init__.py"), QUEUE_FUNCTION)
+
+    for project_index in range(projects):
+        project = project_name(project_index)
+        for function_index in range(functions):
+            http_function = http_function_name(function_index)
+            _write(os.path.join(workspace, project, http_function, "function.json"), json.dumps(http_binding))
+            write_http_function(workspace, project, http_function)
+
+            event_function = event_function_name(function_index)
+            _write(os.path.join(workspace, project, event_function, "function.json"), json.dumps(event_binding))
+            _write(os.path.join(workspace, project, event_function, "__init__.py"), EVENT_FUNCTION)
+    return workspace
+
+def remove_workspace(workspace: str):
+    shutil.rmtree(workspace, ignore_errors=True)
@@ -1,75 +1,326 @@
 import os
 import sys
+import gc
+import time
+import threading
+import asyncio
+import inspect
 import importlib
-from contextlib import contextmanager
+import metrics
+from memory_tracker import MemoryTracker
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from logger import get_logger, new_invocation_id
+
+log = get_logger("context_execution_singleton")
+
+ROOT_DIR = os.getcwd()  # Raiz do workspace; o cwd muda enquanto as funções executam
 
 class ContextExecutionSingleton:
     _pool = {}  # Pool de instâncias, identificadas por (project_dir, main_module)
+    _lock = threading.RLock()  # Serializa mudanças de cwd/sys.path e imports entre threads
+    _thread_pool = None
+    _loading = {}  # Imports em andamento por (project_dir, main_module), aguardados pelas chamadas concorrentes
+    _loading_lock = threading.Lock()
+    _load_listeners = []  # Chamados com cada nova instância (ex.: file watcher em WATCH_MODE=lazy)
     
     def __init__(self, project_dir, main_module, should_log=False):
         self.project_dir = project_dir
+        self.project_path = os.path.join(ROOT_DIR, project_dir)
         self.main_module_name = main_module
+        self.isolated = self.is_thread_mode()
         self.should_log = should_log
+        self.always_reload = os.getenv("ALWAYS_RELOAD_MODULES", "false").lower() == "true"
+        self.main = None
+        self._signature_of = None  # main cuja assinatura foi inspecionada (parâmetro context)
+        self._wants_context = False
 
         try:
-            with self.change_directory(self.project_dir):
+            with self.import_context():
                 self.main_module = importlib.import_module(main_module)
         except ImportError as e:
-            print(f"Error initializing module: {e}")
+            log.error(f"Error initializing module: {e}")
             self.main_module = None
 
     @staticmethod
+    def execution_mode() -> str:
+        """inline, thread, process or zygote (see EXECUTION_MODE)."""
+        return os.getenv("EXECUTION_MODE", "inline").lower()
+
+    @classmethod
+    def is_thread_mode(cls) -> bool:
+        """Whether main runs on the thread pool instead of the event loop."""
+        return cls.execution_mode() == "thread"
+
+    @classmethod
+    def is_process_mode(cls) -> bool:
+        """Whether main runs in the worker processes of worker_pool."""
+        return cls.execution_mode() in ("process", "zygote")
+
+    @classmethod
+    def thread_pool(cls) -> ThreadPoolExecutor:
+        """Bounded pool used to run main in thread mode."""
+        if cls._thread_pool is None:
+            with cls._lock:
+                if cls._thread_pool is None:
+                    cls._thread_pool = ThreadPoolExecutor(
+                        max_workers=int(os.getenv("EXECUTION_THREAD_POOL_SIZE", "8")),
+                        thread_name_prefix="localrunner-exec"
+                    )
+        return cls._thread_pool
+
+    @classmethod
     @contextmanager
-    def change_directory(destination):
-        original_directory = os.getcwd()
-        absolute_path = os.path.abspath(destination)  # Retrieve the absolute path for the directory
-        sys.path.insert(0, absolute_path)  # Add directory to sys.path
-        os.chdir(absolute_path)
-        try:
-            yield
-        finally:
-            os.chdir(original_directory)
-            sys.path.pop(0)  # Remove directory from sys.path after use
-
-    def refresh_module(self, module_name):
-        """Refresh a specific module."""
-        
-        # Remove project_dir from module_name if it exists
-        if module_name.startswith(self.project_dir.replace(os.sep, '.')):
-            module_name = module_name[len(self.project_dir.replace(os.sep, '.')) + 1:]
-        with self.change_directory(self.project_dir):
+    def change_directory(cls, destination):
+        with cls._lock:
+            original_directory = os.getcwd()
+            absolute_path = os.path.abspath(destination)  # Retrieve the absolute path for the directory
+            sys.path.insert(0, absolute_path)  # Add directory to sys.path
+            os.chdir(absolute_path)
             try:
-                module = importlib.import_module(module_name)
-                return importlib.reload(module)
-            except ImportError as e:
-                if self.should_log:
-                    print(f"Error reloading module {module_name}: {e}")
-                return None
-
-    def execute(self, azure_request):
+                yield
+            finally:
+                os.chdir(original_directory)
+                sys.path.pop(0)  # Remove directory from sys.path after use
+
+    @contextmanager
+    def isolated_import_context(self):
+        """Import without touching the cwd: the project directory stays on sys.path for good.
+
+        The lock only guards sys.path, so imports of different functions can run in parallel.
+        """
+        if self.project_path not in sys.path:
+            with self._lock:
+                if self.project_path not in sys.path:
+                    sys.path.insert(0, self.project_path)
+        yield
+
+    def import_context(self):
+        """Context used to import or reload the function modules."""
+        if self.isolated:
+            return self.isolated_import_context()
+        return self.change_directory(self.project_path)
+
+    def execution_context(self, isolated: bool = False):
+        """Context used while main runs; thread mode and isolated calls never change process-wide state."""
+        if self.isolated:
+            return nullcontext()
+        if isolated:
+            return self.isolated_import_context()
+        return self.change_directory(self.project_path)
+
+    @property
+    def memory_key(self) -> str:
+        """Project.Function of the executor in the memory tracker."""
+        return f"{self.project_dir}.{self.main_module_name.split('.')[0]}"
+
+    def load_main(self):
+        """Return the main function, reloading the module on every call with ALWAYS_RELOAD_MODULES."""
+        module = importlib.import_module(self.main_module_name)
+        if self.always_reload:
+            # Not measured by the MemoryTracker: walking the heap on every call costs too much
+            start = time.perf_counter()
+            module = importlib.reload(module)
+            metrics.record_reload(self.main_module_name, time.perf_counter() - start)
+        return getattr(module, "main")
+
+    def resolve_main(self):
+        """The main function, imported again after reload_modules dropped it."""
+        try:
+            main = self.main
+            if main is None or self.always_reload:
+                with self.import_context():
+                    main = self.main = self.load_main()
+            return main
+        except ModuleNotFoundError as e:
+            raise Exception(f"Module not found: {e}")
+        except AttributeError as e:
+            raise Exception(f"Function 'main' not found in module: {e}")
+
+    def is_async(self) -> bool:
+        """Whether main is declared with async def (without the extra reload of ALWAYS_RELOAD_MODULES)."""
+        main = self.main if self.main is not None else self.resolve_main()
+        return inspect.iscoroutinefunction(main)
+
+    def call_arguments(self, main, context) -> dict:
+        """Keyword arguments besides the trigger: `context` when main declares it, like the Azure host."""
+        if self._signature_of is not main:
+            self._signature_of = main
+            self._wants_context = "context" in inspect.signature(main).parameters
+        if not self._wants_context:
+            return {}
+        if context is None:
+            from LocalRunner.azure_request_type.invocation_context import InvocationContext
+            function_name = self.main_module_name.split(".")[0]
+            context = InvocationContext(new_invocation_id(), function_name, os.path.join(self.project_path, function_name))
+        return {"context": context}
+
+    def execute(self, azure_request, context=None, isolated: bool = False):
         """Execute the main function for the module."""
-        with self.change_directory(self.project_dir):
+        main = self.resolve_main()
+        arguments = self.call_arguments(main, context)
+        with self.execution_context(isolated):
+            result = main(azure_request, **arguments)
+            if inspect.isawaitable(result):
+                # async def main fora do event loop (thread pool ou worker process)
+                result = asyncio.run(result)
+            return result
+
+    def execute_isolated(self, azure_request, context=None):
+        """execute for calls offloaded to the thread pool in inline mode (events with a timeout).
+
+        Like thread mode, main runs from the workspace root without the lock of change_directory, so a
+        running or timed out event does not block the requests served on the event loop.
+        """
+        return self.execute(azure_request, context, isolated=True)
+
+    async def aexecute(self, azure_request, context=None):
+        """Await an async def main on the running loop.
+
+        The cwd is not changed while main is suspended, so it runs from the workspace root like in thread mode.
+        """
+        main = self.resolve_main()
+        return await main(azure_request, **self.call_arguments(main, context))
+
+    @classmethod
+    def _start_loading(cls, key):
+        """Future of the instance and whether the caller is the one that must import it (single-flight)."""
+        with cls._loading_lock:
+            if key in cls._pool:
+                future = Future()
+                future.set_result(cls._pool[key])
+                return future, False
+            if key in cls._loading:
+                return cls._loading[key], False
+            future = cls._loading[key] = Future()
+            return future, True
+
+    @classmethod
+    def _create(cls, key, future: Future):
+        try:
+            instance = cls(*key)
+            cls._pool[key] = instance
+            future.set_result(instance)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with cls._loading_lock:
+                cls._loading.pop(key, None)
+
+        for listener in list(cls._load_listeners):
             try:
-                module = importlib.import_module(self.main_module_name)
-                importlib.reload(module)
+                listener(instance)
+            except Exception as e:
+                log.error(f"Error notifying the load of {instance.main_module_name}: {e}")
+        return instance
 
-                main = getattr(module, "main")
-                return main(azure_request)
-            except ModuleNotFoundError as e:
-                raise Exception(f"Module not found: {e}")
-            except AttributeError as e:
-                raise Exception(f"Function 'main' not found in module: {e}")
+    @classmethod
+    def add_load_listener(cls, listener):
+        """Register a callback called with every instance created by load."""
+        cls._load_listeners.append(listener)
 
     @classmethod
     def load(cls, project_dir: str, main_module: str):
-        """Load an instance from the pool or create a new one."""
+        """Load an instance from the pool or create a new one; concurrent cold callers share one import."""
         key = (project_dir, main_module)
-        if key not in cls._pool:
-            cls._pool[key] = cls(project_dir, main_module)
-        return cls._pool[key]
+        instance = cls._pool.get(key)
+        if instance is not None:
+            return instance
+
+        future, owner = cls._start_loading(key)
+        if owner:
+            return cls._create(key, future)
+        return future.result()
 
     @classmethod
-    def refresh_module_for_all_executors(cls, module_name):
-        """Call refresh_module on all instances in the pool with the given module name."""
+    async def aload(cls, project_dir: str, main_module: str):
+        """load for the event loop: awaits an import in progress instead of blocking the loop."""
+        key = (project_dir, main_module)
+        instance = cls._pool.get(key)
+        if instance is not None:
+            return instance
+
+        future, owner = cls._start_loading(key)
+        if not owner:
+            return await asyncio.wrap_future(future)
+        if cls.is_thread_mode():
+            # Em modo thread o import também sai do event loop
+            return await asyncio.get_running_loop().run_in_executor(cls.thread_pool(), cls._create, key, future)
+        return cls._create(key, future)
+
+    @classmethod
+    def module_context(cls, module):
+        """Directory context of the executor whose project contains the module file."""
+        file_path = os.path.abspath(getattr(module, "__file__", None) or "")
+        for inst in cls._pool.values():
+            if file_path.startswith(inst.project_path + os.sep):
+                return inst.import_context()
+        return cls._lock
+
+    @classmethod
+    def reload_modules(cls, module_names):
+        """Reload the modules in the given order and rebind the executors whose main module was reloaded."""
+        timings = []
+        module_names = list(module_names)
+        affected = [inst for inst in cls._pool.values() if inst.main_module_name in module_names]
+        with MemoryTracker.measure(inst.memory_key for inst in affected):
+            for module_name in module_names:
+                module = sys.modules.get(module_name)
+                if module is None:
+                    continue
+
+                start = time.perf_counter()
+                try:
+                    with cls.module_context(module):
+                        importlib.reload(module)
+                except Exception as e:
+                    log.error(f"Error reloading module {module_name}: {e}")
+                    continue
+                elapsed = time.perf_counter() - start
+                metrics.record_reload(module_name, elapsed)
+                timings.append((module_name, elapsed * 1000))
+
+        reloaded = {module_name for module_name, _ in timings}
         for inst in cls._pool.values():
-            inst.refresh_module(module_name)
\ No newline at end of file
+            if inst.main_module_name in reloaded:
+                inst.main = None
+        cls.enforce_memory_budget(affected)
+        return timings
+
+    @classmethod
+    def enforce_memory_budget(cls, instances):
+        """Rebuild (or restart) the executors whose reloads exceeded EXECUTOR_MEMORY_BUDGET_MB."""
+        over_budget = set(MemoryTracker.over_budget(inst.memory_key for inst in instances))
+        if not over_budget:
+            return
+        if MemoryTracker.budget_action() == "restart":
+            MemoryTracker.restart_process()
+        for project_dir in {inst.project_dir for inst in instances if inst.memory_key in over_budget}:
+            cls.rebuild_project(project_dir)
+        for key in over_budget:
+            MemoryTracker.rebuilt(key)
+
+    @classmethod
+    def rebuild_project(cls, project_dir: str):
+        """Drop the executors of the project and purge its modules from sys.modules.
+
+        The next request imports them from scratch, so the old module objects kept alive by the reloads can be collected.
+        SharedLibraries are shared by every project and are not purged.
+        """
+        start = time.perf_counter()
+        project_prefix = os.path.join(ROOT_DIR, project_dir) + os.sep
+        with cls._lock:
+            for key in [key for key, inst in cls._pool.items() if inst.project_dir == project_dir]:
+                del cls._pool[key]
+            purged = [
+                name for name, module in list(sys.modules.items())
+                if (getattr(module, "__file__", None) or "").startswith(project_prefix)
+            ]
+            for name in purged:
+                del sys.modules[name]
+        collected = gc.collect()
+        log.info(
+            f"Memory budget exceeded: rebuilt {project_dir} from a clean state "
+            f"({len(purged)} modules purged, {collected} objects collected in {(time.perf_counter() - start) * 1000:.0f}ms)"
+        )
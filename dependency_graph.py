@@ -0,0 +1,117 @@
+import os
+import ast
+import sys
+import importlib.util
+from collections import deque
+from typing import Dict, Iterable, List, Set
+
+LOCAL_RUNNER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class DependencyGraph:
+    """Reverse import graph of the workspace modules currently loaded in sys.modules."""
+
+    def __init__(self, root_dir: str):
+        self.root_dir = os.path.abspath(root_dir)
+        self._imports_cache = {}  # Cache do AST por arquivo: file -> (mtime, imports)
+
+    def is_tracked_file(self, file_path: str) -> bool:
+        return (
+            file_path.startswith(self.root_dir + os.sep)
+            and not file_path.startswith(LOCAL_RUNNER_DIR + os.sep)
+            and "site-packages" not in file_path
+        )
+
+    def tracked_modules(self) -> Dict[str, str]:
+        """Map every loaded workspace module name to its source file."""
+        modules = {}
+        for name, module in list(sys.modules.items()):
+            file_path = getattr(module, "__file__", None)
+            if not file_path or not file_path.endswith(".py"):
+                continue
+            file_path = os.path.abspath(file_path)
+            if self.is_tracked_file(file_path):
+                modules[name] = file_path
+        return modules
+
+    def imports_of(self, module_name: str, file_path: str) -> Set[str]:
+        """Return the absolute module names imported by a source file."""
+        try:
+            mtime = os.stat(file_path).st_mtime_ns
+        except OSError:
+            return set()
+
+        cached = self._imports_cache.get(file_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            with open(file_path, "rb") as f:
+                tree = ast.parse(f.read(), filename=file_path)
+        except (SyntaxError, ValueError, OSError):
+            return cached[1] if cached else set()
+
+        module = sys.modules.get(module_name)
+        package = getattr(module, "__package__", None) or module_name.rpartition(".")[0]
+        imports = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                imports.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                try:
+                    base = importlib.util.resolve_name("." * node.level + (node.module or ""), package)
+                except (ImportError, ValueError):
+                    continue
+                imports.add(base)
+                imports.update(f"{base}.{alias.name}" for alias in node.names if alias.name != "*")
+
+        self._imports_cache[file_path] = (mtime, imports)
+        return imports
+
+    def reverse_graph(self, modules: Dict[str, str]) -> Dict[str, Set[str]]:
+        """Map each module to the modules that import it."""
+        dependents = {name: set() for name in modules}
+        for name, file_path in modules.items():
+            for imported in self.imports_of(name, file_path):
+                if imported in dependents and imported != name:
+                    dependents[imported].add(name)
+        return dependents
+
+    def reload_order(self, file_paths: Iterable[str]) -> List[str]:
+        """Modules defined by the changed files plus their transitive dependents, dependencies first."""
+        modules = self.tracked_modules()
+        changed_files = {os.path.abspath(file_path) for file_path in file_paths}
+        changed = [name for name, file_path in modules.items() if file_path in changed_files]
+        if not changed:
+            return []
+
+        dependents = self.reverse_graph(modules)
+        affected = set(changed)
+        pending = deque(changed)
+        while pending:
+            for dependent in dependents[pending.popleft()]:
+                if dependent not in affected:
+                    affected.add(dependent)
+                    pending.append(dependent)
+
+        # Kahn's algorithm restricted to the affected subgraph
+        in_degree = {name: 0 for name in affected}
+        for name in affected:
+            for dependent in dependents[name]:
+                if dependent in affected:
+                    in_degree[dependent] += 1
+
+        ready = deque(sorted(name for name, degree in in_degree.items() if degree == 0))
+        order = []
+        while ready:
+            name = ready.popleft()
+            order.append(name)
+            for dependent in sorted(dependents[name]):
+                if dependent in in_degree:
+                    in_degree[dependent] -= 1
+                    if in_degree[dependent] == 0:
+                        ready.append(dependent)
+
+        # Import cycles cannot be ordered, reload them after everything else
+        ordered = set(order)
+        order.extend(sorted(name for name in affected if name not in ordered))
+        return order
@@ -1,6 +1,13 @@
 import os
 import sys
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from context_execution_singleton import ContextExecutionSingleton as executor
+from function_registry import FunctionRegistry
+from logger import get_logger
+
+log = get_logger("environment")
 
 class BaseEnvironmentSetup:
     def __init__(self):
@@ -20,14 +27,70 @@ class BaseEnvironmentSetup:
         if self.root_dir not in sys.path:
             sys.path.insert(0, self.root_dir)
         
-        print(f"Environment configured with root directory: {self.root_dir}")
+        log.info(f"Environment configured with root directory: {self.root_dir}")
         
+    def projects_to_index(self):
+        """Projects whose functions are indexed in the function registry"""
+        return [os.path.basename(directory) for directory in self.directories_to_watch]
+
+    def setup_function_registry(self):
+        """Index the function.json of every served function once at startup"""
+        start = time.perf_counter()
+        total = FunctionRegistry.build(self.projects_to_index())
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        log.info(f"Function registry built with {total} functions in {elapsed_ms:.1f}ms")
+
     def setup_executor(self):
         """Configure the executor"""
-        print(f"Setupping Executor")
-        
+        log.info(f"Setupping Executor")
+        if os.getenv("PREWARM", "false").lower() == "true":
+            self.prewarm()
+
+    def functions_to_prewarm(self):
+        """Functions imported by the prewarm"""
+        return FunctionRegistry.functions()
+
+    def prewarm(self):
+        """Import the served functions in parallel so the first requests do not pay for it"""
+        if executor.is_process_mode():
+            log.info("Prewarm skipped: in process mode the functions are imported by the workers")
+            return
+
+        def warm(func_info):
+            start = time.perf_counter()
+            instance = executor.load(project_dir=func_info.project, main_module=func_info.main_module)
+            return func_info, instance.main_module is not None, (time.perf_counter() - start) * 1000
+
+        functions = self.functions_to_prewarm()
+        start = time.perf_counter()
+        workers = max(1, int(os.getenv("PREWARM_WORKERS", "8")))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="localrunner-prewarm") as pool:
+            results = list(pool.map(warm, functions))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        failed = [f"{func_info.project}.{func_info.function_name}" for func_info, loaded, _ in results if not loaded]
+        log.info(f"Prewarm imported {len(results) - len(failed)} of {len(results)} functions in {elapsed_ms:.1f}ms")
+        for func_info, _, import_ms in sorted(results, key=lambda result: result[2], reverse=True)[:5]:
+            log.info(f"  {func_info.project}.{func_info.function_name}: {import_ms:.1f}ms")
+        if failed:
+            log.error(f"  Failed to import: {', '.join(failed)}")
+
+    def setup_event_bus(self):
+        """Let local_event_bus.publish deliver events of this instance without HTTP"""
+        from proxy.event_dispatcher import EventDispatcher
+        EventDispatcher.bind_loop(asyncio.get_running_loop())
+        if os.getenv("USE_LOCAL_EVENT_BUS", "true").lower() == "true":
+            log.info("Local event bus enabled")
+
+    def setup_local_queues(self):
+        """Start the consumers of the queueTrigger/serviceBusTrigger functions"""
+        from local_queue import LocalQueue, spool_directory
+        names = LocalQueue.start_all()
+        if names:
+            log.info(f"Local queues started: {', '.join(names)} (spool in {spool_directory()})")
+
     def setup_file_watcher(self):
-        print(f"Setupping File watcher")
+        log.info(f"Setupping File watcher")
         from threading import Thread
         from file_watcher import start_file_watcher
         # Start the file watcher
@@ -35,13 +98,17 @@ class BaseEnvironmentSetup:
         watcher_thread.daemon = True
         watcher_thread.start()
         folder_names = [os.path.basename(directory) for directory in self.directories_to_watch]
-        print(f"File watcher started for directories: {folder_names}")
+        log.info(f"File watcher started for directories: {folder_names}")
 
 class DynamicEnvironmentSetup(BaseEnvironmentSetup):
     """Environment setup for dynamic mode"""
     pass
     
 class ProjectEnvironmentSetup(BaseEnvironmentSetup):
+    def projects_to_index(self):
+        project = os.getenv("PROJECT")
+        return [project] if project else []
+
     def setup_file_watcher(self):
         """Start a file watcher to reload modules on changes"""
         project = os.getenv("PROJECT")
@@ -59,23 +126,25 @@ class ProjectEnvironmentSetup(BaseEnvironmentSetup):
                     [os.path.join(self.root_dir, extra.strip()) for extra in extra_projects_to_track if extra.strip()]
                 )
             except ValueError:
-                print("Invalid PROJECT: #{project} to watch")
+                log.warning("Invalid PROJECT: #{project} to watch")
                 self.directories_to_watch = []
             super().setup_file_watcher()
 
 class ProjectFunctionEnvironmentSetup(ProjectEnvironmentSetup):
+    def functions_to_prewarm(self):
+        func_info = FunctionRegistry.get(os.getenv("PROJECT"), os.getenv("FUNCTION"))
+        return [func_info] if func_info else []
+
     def setup_executor(self):
         super().setup_executor()
         project = os.getenv("PROJECT")
         function = os.getenv("FUNCTION")
         if project and function:
-            try:
-                executor.load(
-                    project_dir=project,
-                    main_module=function
-                )
-                print(f"Executor loaded for PROJECT.FUNCTION: {project}.{function}")
-            except ValueError:
-                print("Invalid PROJECT.FUNCTION format. Expected 'ProjectDir.MainModule'")
+            func_info = FunctionRegistry.get(project, function)
+            if not func_info:
+                log.warning(f"Function {project}.{function} not found. Skipping executor load.")
+            elif not executor.is_process_mode():
+                executor.load(project_dir=project, main_module=func_info.main_module)
+                log.info(f"Executor loaded for PROJECT.FUNCTION: {project}.{function}")
         else:
-            print("PROJECT and FUNCTION is not set. Skipping executor load.")
+            log.warning("PROJECT and FUNCTION is not set. Skipping executor load.")
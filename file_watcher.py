@@ -1,55 +1,212 @@
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from context_execution_singleton import ContextExecutionSingleton
+from function_registry import FunctionRegistry
+from dependency_graph import DependencyGraph
+from worker_pool import WorkerPool
+from response_cache import ResponseCache
 import os
+import time
+import threading
+import metrics
+from logger import get_logger
+
+log = get_logger("file_watcher")
+
+IGNORED_DIRECTORIES = {"__pycache__", ".git", ".hg", ".svn", ".mypy_cache", ".pytest_cache", ".ruff_cache", ".venv", "venv", "node_modules"}
+IGNORED_SUFFIXES = (".pyc", ".pyo", ".swp", ".swo", ".swx", ".tmp", ".temp", ".bak", "~")
+
+def is_ignored_path(file_path: str) -> bool:
+    """Bytecode caches, VCS folders and the temporary files written by editors while saving."""
+    parts = os.path.normpath(file_path).split(os.sep)
+    if any(part in IGNORED_DIRECTORIES for part in parts[:-1]):
+        return True
+    name = parts[-1]
+    return (
+        name in IGNORED_DIRECTORIES
+        or name.endswith(IGNORED_SUFFIXES)
+        or name.startswith(".#")  # Emacs lock files
+        or (name.startswith("#") and name.endswith("#"))
+        or name == "4913"  # Vim checks if the directory is writable with this file
+    )
 
 class FileChangeHandler(FileSystemEventHandler):
-    def __init__(self, executor: ContextExecutionSingleton = ContextExecutionSingleton, should_log: bool = False):
+    """Collect file system events and apply them in one batch once the burst is over (FILE_WATCH_DEBOUNCE_MS)."""
+
+    def __init__(self, executor: ContextExecutionSingleton = ContextExecutionSingleton, should_log: bool = False, registry: FunctionRegistry = FunctionRegistry):
         self.executor = executor
         self.should_log = should_log
+        self.registry = registry
+        self.dependency_graph = DependencyGraph(os.getcwd())
+        self.debounce = max(0, int(os.getenv("FILE_WATCH_DEBOUNCE_MS", "100"))) / 1000
 
-    def on_modified(self, event):
-        if not event.src_path.endswith(".py"):
+        self._condition = threading.Condition()
+        self._pending_modules = {}  # Arquivos .py alterados, sem repetição e na ordem de chegada
+        self._pending_functions = {}  # Caminhos que podem mudar o function registry
+        self._last_event = 0.0
+        self._flusher = None
+        self.watch_scope = None  # ImportedModulesWatch em WATCH_MODE=lazy
+
+    @staticmethod
+    def is_function_config(file_path):
+        return os.path.basename(file_path) == "function.json"
+
+    def dispatch(self, event):
+        if is_ignored_path(event.src_path) and is_ignored_path(getattr(event, "dest_path", "") or event.src_path):
             return
+        super().dispatch(event)
 
-        if self.should_log:
-            print(f"Detected modification in: {event.src_path}")
+    def on_any_event(self, event):
+        metrics.FILE_WATCHER_EVENTS.inc(event.event_type)
 
-        self.reload_module_and_dependencies(event.src_path)
+    def on_modified(self, event):
+        if self.is_function_config(event.src_path):
+            self.schedule(function_paths=[event.src_path])
+        elif event.src_path.endswith(".py"):
+            self.schedule(module_paths=[event.src_path])
 
     def on_created(self, event):
-        if not event.src_path.endswith(".py"):
-            return
+        if self.is_function_config(event.src_path) or event.is_directory:
+            self.schedule(function_paths=[event.src_path])
+        elif event.src_path.endswith(".py"):
+            self.schedule(function_paths=[event.src_path], module_paths=[event.src_path])
+
+    def on_deleted(self, event):
+        if self.is_function_config(event.src_path) or event.is_directory or event.src_path.endswith(".py"):
+            self.schedule(function_paths=[event.src_path])
+
+    def on_moved(self, event):
+        # Editors save by writing a temporary file and renaming it over the original
+        module_paths = [event.dest_path] if event.dest_path.endswith(".py") and not is_ignored_path(event.dest_path) else []
+        self.schedule(function_paths=[event.src_path, event.dest_path], module_paths=module_paths)
+
+    def schedule(self, function_paths=(), module_paths=()):
+        """Queue the paths for the next batch and restart the quiet window."""
+        with self._condition:
+            for path in function_paths:
+                self._pending_functions[path] = None
+            for path in module_paths:
+                self._pending_modules[path] = None
+            self._last_event = time.monotonic()
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="localrunner-file-watcher", daemon=True)
+                self._flusher.start()
+            self._condition.notify()
 
+    def _flush_loop(self):
+        while True:
+            with self._condition:
+                while not self._pending_modules and not self._pending_functions:
+                    self._condition.wait()
+                # Espera até ficar `debounce` segundos sem eventos novos
+                while (remaining := self._last_event + self.debounce - time.monotonic()) > 0:
+                    self._condition.wait(remaining)
+                function_paths, self._pending_functions = list(self._pending_functions), {}
+                module_paths, self._pending_modules = list(self._pending_modules), {}
+
+            try:
+                self.apply(function_paths, module_paths)
+            except Exception as e:
+                log.error(f"Error applying file changes: {e}")
+
+    def apply(self, function_paths, module_paths):
+        """Apply one burst of changes: refresh the registry once, then reload the modules in one pass."""
+        if function_paths:
+            self.registry.refresh_paths(function_paths)
+            ResponseCache.invalidate_functions(filter(None, map(self.registry.function_of_path, function_paths)))
+        if module_paths:
+            self.reload_modules_and_dependencies(module_paths)
+        if self.watch_scope:
+            # The reloaded code may import modules from directories not watched yet
+            self.watch_scope.sync()
+
+    def reload_modules_and_dependencies(self, file_paths):
         if self.should_log:
-            print(f"Detected new file: {event.src_path}")
-            
-        self.reload_module_and_dependencies(event.src_path)
+            log.info(f"Detected changes in: {', '.join(file_paths)}")
 
-    def reload_module_and_dependencies(self, file_path):
-        if "_cache_" in file_path:
+        # Worker processes never reload: they are replaced by fresh ones
+        if self.executor.is_process_mode():
+            recycled = WorkerPool.recycle_for_paths(file_paths, self.dependency_graph.root_dir)
+            log.info(f"Recycling worker processes of {recycled} after changes in {len(file_paths)} files")
+            # The main process does not import the functions, so it cannot tell which responses depend on the files
+            ResponseCache.clear()
+            return
+
+        # Reload the changed modules and every loaded module that imports them, dependencies first
+        reload_order = self.dependency_graph.reload_order(file_paths)
+        if not reload_order:
             if self.should_log:
-                print(f"Skipping cache file: {file_path}")
+                log.info(f"No loaded module depends on: {', '.join(file_paths)}")
             return
-        
-        # format the path to be imported
-        project_root = os.getcwd().replace("\\", "/")
-        formatted_path = file_path.replace("\\", "/").replace(project_root + "/", "")
-        formatted_path = formatted_path.replace("/", ".").rsplit(".py", 1)[0]
-        self.executor.refresh_module_for_all_executors(formatted_path)
-
-def start_file_watcher(directories_to_watch, executor):
+
+        start = time.perf_counter()
+        timings = self.executor.reload_modules(reload_order)
+        invalidated = ResponseCache.invalidate_modules(reload_order)
+        for module_name, elapsed_ms in timings:
+            log.info(f"Reloaded {module_name} in {elapsed_ms:.1f}ms")
+        if invalidated:
+            log.info(f"Dropped {invalidated} cached responses")
+        changed = os.path.basename(file_paths[0]) if len(file_paths) == 1 else f"{len(file_paths)} files"
+        log.info(f"Hot reload of {changed} finished: {len(timings)} modules in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+class ImportedModulesWatch:
+    """Non-recursive watches on the directories of the imported workspace modules (WATCH_MODE=lazy).
+
+    The watch set grows as executors load new functions, so it scales with the code in use
+    instead of the size of the workspace.
+    """
+
+    def __init__(self, observer, handler: FileChangeHandler, directories_to_watch):
+        self.observer = observer
+        self.handler = handler
+        self.roots = [os.path.abspath(directory) for directory in directories_to_watch]
+        self.watched = set()
+        self._lock = threading.Lock()
+
+    def is_in_scope(self, directory: str) -> bool:
+        return any(directory == root or directory.startswith(root + os.sep) for root in self.roots)
+
+    def sync(self):
+        """Watch the directories of modules imported since the last call."""
+        module_files = self.handler.dependency_graph.tracked_modules().values()
+        directories = {os.path.dirname(file_path) for file_path in module_files}
+        with self._lock:
+            added = sorted(directory for directory in directories - self.watched if self.is_in_scope(directory))
+            for directory in added:
+                try:
+                    self.observer.schedule(self.handler, path=directory, recursive=False)
+                except OSError as e:
+                    log.warning(f"Could not watch {directory}: {e}")
+                self.watched.add(directory)
+        if added:
+            log.info(f"File watcher watching {len(added)} new directories ({len(self.watched)} in total)")
+
+def watch_mode(executor) -> str:
+    """recursive watches every directory; lazy only the directories of imported modules."""
+    mode = os.getenv("WATCH_MODE", "recursive").lower()
+    if mode == "lazy" and executor.is_process_mode():
+        log.warning("WATCH_MODE=lazy is not supported in process mode, the functions are imported by the workers. Watching recursively.")
+        return "recursive"
+    return mode
+
+def start_file_watcher(directories_to_watch, executor, registry=FunctionRegistry):
     if not directories_to_watch:
-        print("No directories to watch. File watcher will not start.")
+        log.info("No directories to watch. File watcher will not start.")
         return
 
-    event_handler = FileChangeHandler(executor)
+    event_handler = FileChangeHandler(executor, registry=registry)
     observer = Observer()
-    for directory in directories_to_watch:
-        if os.path.exists(directory):
-            observer.schedule(event_handler, path=directory, recursive=True)
-        else:
-            print(f"Directory does not exist and will be skipped: {directory}")
+    if watch_mode(executor) == "lazy":
+        registry.watch_lazily()
+        event_handler.watch_scope = ImportedModulesWatch(observer, event_handler, directories_to_watch)
+        event_handler.watch_scope.sync()
+        executor.add_load_listener(lambda instance: event_handler.watch_scope.sync())
+    else:
+        for directory in directories_to_watch:
+            if os.path.exists(directory):
+                observer.schedule(event_handler, path=directory, recursive=True)
+            else:
+                log.warning(f"Directory does not exist and will be skipped: {directory}")
 
     observer.start()
 
@@ -57,4 +214,4 @@ def start_file_watcher(directories_to_watch, executor):
         observer.join()
     except KeyboardInterrupt:
         observer.stop()
-    observer.join()
\ No newline at end of file
+    observer.join()
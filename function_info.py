@@ -1,14 +1,20 @@
 import os
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from enum import Enum
 from utils import load_function_json
+from logger import get_logger
+
+log = get_logger("function_info")
 
 class TYPE(Enum):
     HTTP = "json"
     EVENT = "python_file"
+    QUEUE = "queue"
+
+QUEUE_TRIGGERS = ("queuetrigger", "servicebustrigger")
     
 class FunctionInfo:
-    def __init__(self, project: str, function_name: str, script_file: str, methods: List[str], route: Optional[str], function_dir: str, type: str):
+    def __init__(self, project: str, function_name: str, script_file: str, methods: List[str], route: Optional[str], function_dir: str, type: str, local_runner: Optional[Dict[str, Any]] = None):
         self.project = project
         self.function_name = function_name
         self.script_file = script_file
@@ -16,16 +22,32 @@ class FunctionInfo:
         self.route = route
         self.function_dir = function_dir
         self.type = type
+        self.local_runner = local_runner or {}  # Campo "localRunner" do function.json (ex.: cache)
+        self.queue_name = None
+        self.queue_trigger = None  # queuetrigger ou servicebustrigger
 
     def __str__(self):
         return f"{self.project}.{self.function_name} [{','.join(self.methods)}] -> {self.route or '/'}"
     
+    @property
+    def main_module(self) -> str:
+        """Module of the script file, importable from the project directory (Function.__init__)."""
+        return f"{self.function_name}.{self.script_file}".removesuffix(".py")
+
     def is_http(self) -> bool:
         return self.type == TYPE.HTTP
     
     def is_event(self) -> bool:
         return self.type == TYPE.EVENT
 
+    def is_queue(self) -> bool:
+        return self.type == TYPE.QUEUE
+
+    @property
+    def trigger(self) -> str:
+        """Trigger label used by the metrics: http, event or queue."""
+        return "http" if self.is_http() else "queue" if self.is_queue() else "event"
+
 def get_http_methods(function_config: Dict[str, Any]) -> List[str]:
     for binding in function_config["bindings"]:
         if binding.get("type", "").lower() == "httptrigger":
@@ -47,25 +69,46 @@ def get_type(function_config: Dict[str, Any]) -> str:
             return TYPE.HTTP
         elif binding_type == "eventgridtrigger":
             return TYPE.EVENT
-        return None
+        elif binding_type in QUEUE_TRIGGERS:
+            return TYPE.QUEUE
+    return None
+
+def resolve_app_setting(value: Optional[str]) -> Optional[str]:
+    """Binding expressions like %QueueName% read the value from the environment."""
+    if value and value.startswith("%") and value.endswith("%"):
+        return os.getenv(value.strip("%"), value)
+    return value
+
+def get_queue_binding(function_config: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """(trigger, queue name) of queueTrigger/serviceBusTrigger functions; topics become topic/subscription."""
+    for binding in function_config["bindings"]:
+        binding_type = binding.get("type", "").lower()
+        if binding_type not in QUEUE_TRIGGERS:
+            continue
+        if binding.get("topicName"):
+            name = f"{resolve_app_setting(binding['topicName'])}/{resolve_app_setting(binding.get('subscriptionName', ''))}"
+        else:
+            name = resolve_app_setting(binding.get("queueName"))
+        return binding_type, name
+    return None
 
-def find_function_info(project: str, function_name: str) -> Optional[FunctionInfo]:
+def find_function_info(project: str, function_name: str, base_dir: Optional[str] = None) -> Optional[FunctionInfo]:
     """Find and prepare the function info for a given project and function."""
-    base_dir = os.path.abspath(os.getcwd())
+    base_dir = base_dir or os.path.abspath(os.getcwd())
     project_dir = os.path.join(base_dir, project)
 
     if not os.path.exists(project_dir) or not os.path.isdir(project_dir):
-        print(f"Project directory not found: {project_dir}")
+        log.warning(f"Project directory not found: {project_dir}")
         return None
 
     function_dir = os.path.join(project_dir, function_name)
     if not os.path.exists(function_dir) or not os.path.isdir(function_dir):
-        print(f"Function directory not found: {function_dir}")
+        log.warning(f"Function directory not found: {function_dir}")
         return None
 
     func_config = load_function_json(function_dir)
     if not func_config:
-        print(f"Function configuration not found in: {function_dir}")
+        log.warning(f"Function configuration not found in: {function_dir}")
         return None
 
     script_file = func_config.get("scriptFile", "")
@@ -76,19 +119,24 @@ def find_function_info(project: str, function_name: str) -> Optional[FunctionInf
                 break
 
     if not script_file:
-        print(f"No script file found in function directory: {function_dir}")
+        log.warning(f"No script file found in function directory: {function_dir}")
         return None
 
     methods = get_http_methods(func_config)
     route = get_route(func_config, function_name)
     type = get_type(func_config)
 
-    return FunctionInfo(
+    func_info = FunctionInfo(
         project=project,
         function_name=function_name,
         script_file=script_file,
         methods=methods,
         route=route,
         function_dir=function_dir,
-        type=type
-    )
\ No newline at end of file
+        type=type,
+        local_runner=func_config.get("localRunner")
+    )
+    queue_binding = get_queue_binding(func_config)
+    if queue_binding:
+        func_info.queue_trigger, func_info.queue_name = queue_binding
+    return func_info
@@ -0,0 +1,119 @@
+import os
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+from function_info import FunctionInfo, find_function_info
+from route_table import RouteTable
+
+MAX_MISSING = 1024
+
+class FunctionRegistry:
+    _functions: Dict[Tuple[str, str], FunctionInfo] = {}  # Funções indexadas por (project, function_name)
+    _indexed_projects = set()
+    _missing: "OrderedDict[Tuple[str, str], None]" = OrderedDict()  # Não encontrados no disco, do mais antigo ao mais recente
+    _root_dir = None
+    _index_watched = True  # False em WATCH_MODE=lazy: pastas novas de funções não geram eventos do watcher
+
+    @classmethod
+    def build(cls, projects: Iterable[str]) -> int:
+        """Index every function of the given projects and return how many were found."""
+        cls._root_dir = os.path.abspath(os.getcwd())
+        for project in projects:
+            cls.index_project(project)
+        RouteTable.rebuild(cls.functions())
+        return len(cls._functions)
+
+    @classmethod
+    def index_project(cls, project: str):
+        """Scan a project directory once and register all of its functions."""
+        project_dir = os.path.join(cls.root_dir(), project)
+        if not os.path.isdir(project_dir):
+            return
+
+        for entry in os.scandir(project_dir):
+            if entry.is_dir() and os.path.exists(os.path.join(entry.path, "function.json")):
+                func_info = find_function_info(project, entry.name, cls.root_dir())
+                if func_info:
+                    cls._functions[(project, entry.name)] = func_info
+        cls._indexed_projects.add(project)
+
+    @classmethod
+    def root_dir(cls) -> str:
+        return cls._root_dir or os.path.abspath(os.getcwd())
+
+    @classmethod
+    def get(cls, project: str, function_name: str, fallback: bool = True) -> Optional[FunctionInfo]:
+        """Return the indexed function info; projects outside the index fall back to the disk."""
+        key = (project, function_name)
+        func_info = cls._functions.get(key)
+        if func_info is not None or not fallback:
+            return func_info
+        if cls._index_watched and (key in cls._missing or project in cls._indexed_projects):
+            return None
+
+        func_info = find_function_info(project, function_name, cls.root_dir())
+        if func_info:
+            cls._functions[key] = func_info
+            RouteTable.rebuild(cls.functions())
+        elif cls._index_watched:
+            # Bounded: scanners and typos must not grow it forever; the refresh of the watcher drops entries too
+            cls._missing[key] = None
+            if len(cls._missing) > MAX_MISSING:
+                cls._missing.popitem(last=False)
+        return func_info
+
+    @classmethod
+    def watch_lazily(cls):
+        """WATCH_MODE=lazy does not see new function folders: misses of the index are looked up on the disk."""
+        cls._index_watched = False
+
+    @classmethod
+    def refresh(cls, project: str, function_name: str, rebuild_routes: bool = True) -> Optional[FunctionInfo]:
+        """Re-read a single function from the disk, dropping it if it no longer exists."""
+        function_dir = os.path.join(cls.root_dir(), project, function_name)
+        cls._missing.pop((project, function_name), None)
+        func_info = None
+        if os.path.exists(os.path.join(function_dir, "function.json")):
+            func_info = find_function_info(project, function_name, cls.root_dir())
+
+        if func_info:
+            cls._functions[(project, function_name)] = func_info
+        elif cls._functions.pop((project, function_name), None) is None:
+            return None
+        if rebuild_routes:
+            RouteTable.rebuild(cls.functions())
+        return func_info
+
+    @classmethod
+    def function_of_path(cls, file_path: str) -> Optional[Tuple[str, str]]:
+        """(project, function_name) owning a path (Project/Function or Project/Function/file)."""
+        relative_path = os.path.relpath(os.path.abspath(file_path), cls.root_dir())
+        parts = relative_path.split(os.sep)
+        if parts[0] == ".." or len(parts) not in (2, 3):
+            return None
+        return parts[0], parts[1]
+
+    @classmethod
+    def refresh_path(cls, file_path: str):
+        """Refresh the function owning a changed path."""
+        cls.refresh_paths([file_path])
+
+    @classmethod
+    def refresh_paths(cls, file_paths: Iterable[str]):
+        """Refresh every function owning one of the paths, rebuilding the routes once."""
+        functions = {cls.function_of_path(file_path) for file_path in file_paths} - {None}
+        for project, function_name in functions:
+            cls.refresh(project, function_name, rebuild_routes=False)
+        if functions:
+            RouteTable.rebuild(cls.functions())
+
+    @classmethod
+    def queue_functions(cls, queue_name: Optional[str] = None):
+        """Functions triggered by a local queue, or by any queue when the name is omitted."""
+        return [
+            func_info for func_info in cls._functions.values()
+            if func_info.is_queue() and (queue_name is None or func_info.queue_name == queue_name)
+        ]
+
+    @classmethod
+    def functions(cls):
+        return list(cls._functions.values())
@@ -0,0 +1,58 @@
+import os
+import re
+import json
+from typing import Any, Dict, Optional
+from function_registry import FunctionRegistry
+from logger import get_logger
+
+log = get_logger("host_config")
+
+TIMESPAN = re.compile(r"^(?:(\d+)\.)?(\d+):(\d+):(\d+(?:\.\d+)?)$")
+
+def parse_timespan(value: Any, default: float) -> float:
+    """host.json time spans ("00:05:00", "1.00:00:00") in seconds; plain numbers are already seconds."""
+    if value is None or value == "":
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = TIMESPAN.match(str(value).strip())
+    if not match:
+        return default
+    days, hours, minutes, seconds = match.groups()
+    return int(days or 0) * 86400 + int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+class HostConfig:
+    """host.json of each project, re-read when the file changes."""
+
+    _configs: Dict[str, tuple] = {}  # host.json por projeto: project -> (mtime, config)
+
+    @classmethod
+    def for_project(cls, project: Optional[str]) -> Dict[str, Any]:
+        if not project:
+            return {}
+        path = os.path.join(FunctionRegistry.root_dir(), project, "host.json")
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return {}
+
+        cached = cls._configs.get(project)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            with open(path, encoding="utf-8-sig") as file:
+                config = json.load(file)
+        except (OSError, ValueError) as e:
+            log.warning(f"Invalid host.json of {project}: {e}")
+            config = cached[1] if cached else {}
+        cls._configs[project] = (mtime, config)
+        return config
+
+    @classmethod
+    def extension(cls, project: Optional[str], name: str) -> Dict[str, Any]:
+        """Settings of an extension, e.g. extension("File", "queues")."""
+        return cls.for_project(project).get("extensions", {}).get(name, {}) or {}
+
+    @classmethod
+    def function_timeout(cls, project: Optional[str], default: float = 300) -> float:
+        return parse_timespan(cls.for_project(project).get("functionTimeout"), default)
@@ -0,0 +1,99 @@
+"""Incremental parser of a JSON array received in chunks.
+
+Each item is decoded as soon as it is complete, so a huge batch is processed while it is still
+being received and only the unparsed tail of the body stays in memory. A single top-level object is
+accepted too (CloudEvents structured mode) and returned when the body ends.
+"""
+import re
+import json
+import codecs
+from typing import Any, List
+
+NON_WHITESPACE = re.compile(r"\S")
+NUMBER_CHARS = "0123456789.eE+-"
+_decoder = json.JSONDecoder()
+
+class JsonArrayParser:
+    def __init__(self):
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.state = "start"  # start, before_item, after_item, object, done
+        self.retry_at = 0  # Tamanho do buffer para tentar de novo um item incompleto
+        self.count = 0
+        self.is_object = False  # Corpo com um único objeto no topo em vez de um array
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """Items completed by this chunk."""
+        self.buffer += self.decoder.decode(chunk)
+        return self._parse(final=False)
+
+    def close(self) -> List[Any]:
+        """Items left when the body ends; raises ValueError if the body is not a complete array."""
+        self.buffer += self.decoder.decode(b"", final=True)
+        self.retry_at = 0
+        items = self._parse(final=True)
+        if self.state == "object":
+            items.append(json.loads(self.buffer))
+            self.state = "done"
+        elif self.state == "start":
+            raise ValueError("Empty body")
+        elif self.state != "done":
+            raise ValueError("Unexpected end of the JSON array")
+        self.buffer = ""
+        return items
+
+    def _parse(self, final: bool) -> List[Any]:
+        items = []
+        buffer = self.buffer
+        position = 0
+        while self.state != "object":
+            match = NON_WHITESPACE.search(buffer, position)
+            if match is None:
+                position = len(buffer)
+                break
+            position = match.start()
+            char = buffer[position]
+
+            if self.state == "done":
+                raise ValueError("Unexpected data after the JSON array")
+            if self.state == "start":
+                if char == "{":
+                    self.state = "object"
+                    self.is_object = True
+                    break
+                if char != "[":
+                    raise ValueError("Request body must be a list.")
+                position += 1
+                self.state = "before_item"
+            elif self.state == "after_item":
+                if char not in ",]":
+                    raise ValueError(f"Expected ',' or ']' between events but found {char!r}")
+                position += 1
+                self.state = "before_item" if char == "," else "done"
+            elif char == "]":
+                if self.count:
+                    raise ValueError("Trailing comma in the JSON array")
+                position += 1
+                self.state = "done"
+            else:
+                if len(buffer) < self.retry_at:
+                    break  # The item that did not parse has not grown enough yet
+                try:
+                    item, end = _decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError as e:
+                    if final:
+                        raise ValueError(f"Invalid event in the batch: {e.msg}")
+                    # Probably incomplete: retry once the pending data doubles, so a big item is not parsed again for every chunk
+                    self.retry_at = len(buffer) + (len(buffer) - position)
+                    break
+                if not final and buffer[end - 1] not in '}]"el' and (end == len(buffer) or buffer[end] in NUMBER_CHARS):
+                    break  # A number at the end of the buffer may continue in the next chunk
+                items.append(item)
+                position = end
+                self.retry_at = 0
+                self.count += 1
+                self.state = "after_item"
+
+        # Only the unparsed tail is kept
+        self.buffer = buffer[position:]
+        return items
@@ -0,0 +1,215 @@
+"""Publish EventGrid events without an HTTP round trip when the endpoint is served by this instance.
+
+Functions that emit events to `http://localhost:PORT/event/...` can call `publish` instead of
+posting the events themselves:
+
+    try:
+        from local_event_bus import publish
+    except ImportError:
+        publish = None
+
+Events for this instance go straight to the dispatch queue of the function as python objects.
+Events for other endpoints are posted over pooled keep-alive HTTP connections.
+"""
+import os
+import json
+import time
+import asyncio
+import threading
+import contextvars
+import http.client
+from urllib.parse import urlsplit
+from typing import Any, List, Optional, Tuple
+
+from function_info import FunctionInfo
+from function_registry import FunctionRegistry
+from proxy.event_dispatcher import EventDispatcher
+import metrics
+import logger
+
+log = logger.get_logger("local_event_bus")
+
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "0.0.0.0", "::1"}
+
+_connections = {}  # Conexões HTTP ociosas por (scheme, host, port)
+_connections_lock = threading.Lock()
+LOOP_WAITING = contextvars.ContextVar("loop_waiting", default=False)  # O event loop está bloqueado esperando esta entrega síncrona
+
+def local_bus_enabled() -> bool:
+    return os.getenv("USE_LOCAL_EVENT_BUS", "true").lower() == "true" and EventDispatcher.loop is not None
+
+def resolve_local_function(endpoint: str) -> Optional[FunctionInfo]:
+    """Event function of this instance served at the endpoint, following the routes of the running mode."""
+    url = urlsplit(endpoint)
+    if url.hostname not in LOCAL_HOSTS or (url.port or 80) != int(os.getenv("PORT", 3000)):
+        return None
+
+    parts = [part for part in url.path.split("/") if part]
+    if not parts or parts[0] != "event":
+        return None
+
+    project, function = os.getenv("PROJECT"), os.getenv("FUNCTION")
+    if project and function:
+        found = (project, function) if len(parts) == 1 else None
+    elif project:
+        # Behind the supervisor gateway the events of this project come as /event/Project.Function
+        function_name = parts[1].removeprefix(f"{project}.") if len(parts) == 2 else None
+        found = (project, function_name) if function_name and "." not in function_name else None
+    else:
+        found = tuple(parts[1].split(".", 1)) if len(parts) == 2 and "." in parts[1] else None
+
+    func_info = FunctionRegistry.get(*found) if found else None
+    return func_info if func_info and func_info.is_event() else None
+
+def publish(endpoint: str, events: List[dict], sync: bool = False, timeout: int = 300) -> Tuple[int, Any]:
+    """Deliver a batch of events to an /event endpoint and return (status_code, response body).
+
+    Local events are not copied: do not change them after publishing.
+    """
+    func_info = resolve_local_function(endpoint) if local_bus_enabled() else None
+    if func_info is None:
+        return _publish_http(endpoint, events, sync, timeout)
+    return _publish_local(func_info, events, sync, timeout)
+
+def _publish_local(func_info: FunctionInfo, events: List[dict], sync: bool, timeout: int) -> Tuple[int, Any]:
+    from proxy.event_proxy import EventProxy
+    from context_execution_singleton import ContextExecutionSingleton as executor
+
+    proxy = EventProxy(None, f"{func_info.project}.{func_info.function_name}")
+    loop = EventDispatcher.loop
+    try:
+        on_loop_thread = asyncio.get_running_loop() is loop
+    except RuntimeError:
+        on_loop_thread = False
+
+    if sync and not executor.is_thread_mode() and (on_loop_thread or LOOP_WAITING.get()):
+        # Inline mode: the caller is main itself on the event loop, which cannot await the proxy
+        return _run_inline(func_info, events, timeout)
+    if on_loop_thread:
+        if sync:
+            # async def main in thread mode: the loop cannot wait for the event it is supposed to run
+            return 400, {"error": "Synchronous publish is not supported from async def main. Publish with sync=False or call it through asyncio.to_thread."}
+        return _to_result(proxy.enqueue(func_info, events, timeout))
+    if LOOP_WAITING.get():
+        # The loop is blocked by the delivery that made this publish: waiting for it would only end at its timeout
+        loop.call_soon_threadsafe(_enqueue_later, proxy, func_info, events, timeout)
+        return 200, {"status": "accepted"}
+
+    async def deliver():
+        if sync:
+            return await proxy._execute_sync_mode(func_info, events, timeout)
+        return proxy.enqueue(func_info, events, timeout)
+
+    return _to_result(asyncio.run_coroutine_threadsafe(deliver(), loop).result())
+
+def _enqueue_later(proxy, func_info: FunctionInfo, events: List[dict], timeout: int):
+    status_code, body = _to_result(proxy.enqueue(func_info, events, timeout))
+    if status_code >= 400:
+        log.warning(f"Events published to {func_info.project}.{func_info.function_name} were dropped: {body.get('error')}")
+
+def _run_inline(func_info: FunctionInfo, events: List[dict], timeout: int) -> Tuple[int, Any]:
+    """Synchronous delivery while the event loop waits for it, like a sync /event call.
+
+    main runs isolated on the thread pool with its own invocation context and metrics, and the caller
+    stops waiting after timeout (504). Holding the cwd lock there would block the requests of the loop.
+    """
+    from context_execution_singleton import ContextExecutionSingleton as executor
+    from LocalRunner.azure_request_type.event_request import EventRequest
+    from LocalRunner.azure_request_type.invocation_context import InvocationContext
+
+    if len(events) != 1:
+        return 400, {"error": "Synchronous mode only supports a list with exactly one item."}
+
+    name = f"{func_info.project}.{func_info.function_name}"
+    context = InvocationContext.create(func_info)
+    start = time.perf_counter()
+    status = 504
+
+    def run():
+        LOOP_WAITING.set(True)
+        with logger.invocation(context.invocation_id, name):
+            instance = executor.load(project_dir=func_info.project, main_module=func_info.main_module)
+            return instance.execute_isolated(EventRequest(events[0]), context)
+
+    # The caller may be inside change_directory: waiting on the condition releases the executor lock,
+    # so imports and reloads of the pool thread do not wait for the caller that waits for them
+    waiting = threading.Condition(executor._lock)
+
+    def notify(_):
+        with waiting:
+            waiting.notify_all()
+
+    future = executor.thread_pool().submit(contextvars.copy_context().run, run)
+    future.add_done_callback(notify)
+    with waiting:
+        finished = waiting.wait_for(future.done, timeout)
+    try:
+        if not finished:
+            return 504, {"error": f"Execution of function {func_info.function_name} exceeded the time limit of {timeout} seconds"}
+        future.result()
+        status = 200
+        return 200, [{"status": "completed"}]
+    except Exception as e:
+        status = 500
+        log.error(f"Function execution failed: {e}")
+        return 500, {"error": f"Function execution failed: {str(e)}"}
+    finally:
+        labels = (name, func_info.trigger, str(status))
+        metrics.INVOCATIONS.inc(*labels)
+        metrics.INVOCATION_DURATION.observe(time.perf_counter() - start, *labels)
+
+def _to_result(response) -> Tuple[int, Any]:
+    return response.status_code, json.loads(response.body)
+
+def _connection(scheme: str, host: str, port: int) -> http.client.HTTPConnection:
+    with _connections_lock:
+        idle = _connections.get((scheme, host, port))
+        if idle:
+            return idle.pop()
+    connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+    return connection_class(host, port)
+
+def _release(scheme: str, host: str, port: int, connection: http.client.HTTPConnection):
+    with _connections_lock:
+        _connections.setdefault((scheme, host, port), []).append(connection)
+
+def _publish_http(endpoint: str, events: List[dict], sync: bool, timeout: int) -> Tuple[int, Any]:
+    """POST the events reusing a keep-alive connection to the endpoint host."""
+    url = urlsplit(endpoint)
+    scheme = url.scheme or "http"
+    port = url.port or (443 if scheme == "https" else 80)
+    path = url.path + (f"?{url.query}" if url.query else "")
+    body = json.dumps(events).encode()
+    headers = {
+        "Content-Type": "application/json",
+        "aeg-event-type": "Notification",
+        "sync": "true" if sync else "false",
+        "timeout": str(timeout)
+    }
+
+    for attempt in range(2):
+        connection = _connection(scheme, url.hostname, port)
+        connection.timeout = timeout + 5 if sync else 30
+        if connection.sock is not None:
+            connection.sock.settimeout(connection.timeout)
+        try:
+            connection.request("POST", path, body=body, headers=headers)
+            response = connection.getresponse()
+            content = response.read()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            connection.close()
+            if attempt:
+                raise
+            continue  # A conexão ociosa foi fechada pelo servidor; tenta com uma nova
+        except Exception:
+            connection.close()
+            raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            _release(scheme, url.hostname, port, connection)
+        try:
+            return response.status, json.loads(content)
+        except ValueError:
+            return response.status, content.decode(errors="replace")
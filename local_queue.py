@@ -0,0 +1,329 @@
+"""Local queues for queueTrigger and serviceBusTrigger functions.
+
+Messages posted to /queue/{name} are appended to a spool file per queue and delivered in batches
+to the functions bound to the queue, following the queue settings of the host.json of their
+project. Messages not completed survive a restart; failed ones are retried after the visibility
+timeout and moved to the poison queue after maxDequeueCount attempts.
+"""
+import os
+import json
+import time
+import uuid
+import heapq
+import asyncio
+import tempfile
+from collections import deque
+from urllib.parse import quote, unquote
+from typing import Dict, List, Optional
+import metrics
+from function_info import FunctionInfo
+from function_registry import FunctionRegistry
+from host_config import HostConfig, parse_timespan
+from logger import get_logger
+
+log = get_logger("local_queue")
+
+COMPACT_MIN_RECORDS = 1000  # Registros no spool antes de considerar reescrevê-lo
+UNBOUND_RECHECK_INTERVAL = 5  # Segundos entre verificações de filas sem função
+
+QUEUE_MESSAGES = metrics.Counter(
+    "localrunner_local_queue_messages_total",
+    "Messages of the local queues by result (completed, failed, poisoned).",
+    ("queue", "result")
+)
+
+def spool_directory() -> str:
+    """LOCAL_QUEUE_DIR, or a directory per instance in the temp dir."""
+    instance = "-".join(filter(None, [os.getenv("PORT", "3000"), os.getenv("PROJECT"), os.getenv("FUNCTION")]))
+    return os.getenv("LOCAL_QUEUE_DIR") or os.path.join(tempfile.gettempdir(), "localrunner-queues", instance)
+
+def bound_functions(queue_name: str) -> List[FunctionInfo]:
+    """Functions served by this instance that are triggered by the queue."""
+    functions = FunctionRegistry.queue_functions(queue_name)
+    function = os.getenv("FUNCTION")
+    return [func_info for func_info in functions if func_info.function_name == function] if function else functions
+
+def queues_for(name: str) -> List[str]:
+    """Bound queues receiving a message posted to the name: the queue itself or every subscription of a topic."""
+    names = {func_info.queue_name for func_info in FunctionRegistry.queue_functions() if bound_functions(func_info.queue_name)}
+    return sorted(queue_name for queue_name in names if queue_name == name or queue_name.startswith(name + "/"))
+
+def _setting(env: str, value, default, convert=int):
+    raw = os.getenv(env)
+    return convert(raw if raw not in (None, "") else value if value is not None else default)
+
+class QueueSettings:
+    """Batching and retry settings of a queue, from the host.json of the project of its function."""
+
+    def __init__(self, batch_size: int, new_batch_threshold: int, max_concurrency: int, max_dequeue_count: int, visibility_timeout: float, poison_queue: str):
+        self.batch_size = max(1, batch_size)
+        self.new_batch_threshold = new_batch_threshold
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_dequeue_count = max(1, max_dequeue_count)
+        self.visibility_timeout = visibility_timeout
+        self.poison_queue = poison_queue
+
+    @classmethod
+    def for_function(cls, func_info: FunctionInfo) -> "QueueSettings":
+        visibility_env = os.getenv("QUEUE_VISIBILITY_TIMEOUT")
+        if func_info.queue_trigger == "servicebustrigger":
+            options = HostConfig.extension(func_info.project, "serviceBus")
+            handler_options = options.get("messageHandlerOptions", {})
+            max_calls = _setting("QUEUE_MAX_CONCURRENCY", options.get("maxConcurrentCalls", handler_options.get("maxConcurrentCalls")), 16)
+            return cls(
+                batch_size=_setting("QUEUE_BATCH_SIZE", options.get("prefetchCount") or None, max_calls),
+                new_batch_threshold=max_calls - 1,
+                max_concurrency=max_calls,
+                max_dequeue_count=_setting("QUEUE_MAX_DEQUEUE_COUNT", None, 10),  # MaxDeliveryCount padrão do Service Bus
+                visibility_timeout=float(visibility_env) if visibility_env else 0,
+                poison_queue=f"{func_info.queue_name}/$deadletterqueue"
+            )
+
+        options = HostConfig.extension(func_info.project, "queues")
+        batch_size = _setting("QUEUE_BATCH_SIZE", options.get("batchSize"), 16)
+        new_batch_threshold = _setting("QUEUE_NEW_BATCH_THRESHOLD", options.get("newBatchThreshold"), batch_size // 2)
+        return cls(
+            batch_size=batch_size,
+            new_batch_threshold=new_batch_threshold,
+            max_concurrency=_setting("QUEUE_MAX_CONCURRENCY", None, batch_size + new_batch_threshold),
+            max_dequeue_count=_setting("QUEUE_MAX_DEQUEUE_COUNT", options.get("maxDequeueCount"), 5),
+            visibility_timeout=float(visibility_env) if visibility_env else parse_timespan(options.get("visibilityTimeout"), 0),
+            poison_queue=f"{func_info.queue_name}-poison"
+        )
+
+class Message:
+    __slots__ = ("id", "body", "insertion_time", "dequeue_count")
+
+    def __init__(self, id: str, body: str, insertion_time: float, dequeue_count: int = 0):
+        self.id = id
+        self.body = body
+        self.insertion_time = insertion_time
+        self.dequeue_count = dequeue_count
+
+    def enqueue_record(self) -> dict:
+        return {"op": "enqueue", "id": self.id, "body": self.body, "insertion_time": self.insertion_time, "dequeue_count": self.dequeue_count}
+
+    def to_payload(self, trigger: str) -> dict:
+        return {"id": self.id, "body": self.body, "insertion_time": self.insertion_time, "dequeue_count": self.dequeue_count, "trigger": trigger}
+
+class LocalQueue:
+    """One queue: an append-only spool file plus a consumer task that dequeues in batches."""
+
+    _queues: Dict[str, "LocalQueue"] = {}  # Filas por nome
+
+    def __init__(self, name: str, directory: str):
+        self.name = name
+        self.path = os.path.join(directory, quote(name, safe="") + ".jsonl")
+        self.messages: Dict[str, Message] = {}  # Mensagens pendentes, na ordem de chegada
+        self.ready = deque()  # Ids visíveis, prontos para o próximo lote
+        self.delayed = []  # Heap de (visible_at, id) esperando o visibility timeout
+        self.in_flight = 0
+        self.records = 0
+        self.enqueued = 0
+        self.completed = 0
+        self.failed = 0
+        self.poisoned = 0
+        self.wakeup = None
+        self.consumer = None
+        self.tasks = set()
+        self._next_function = 0
+        self._load()
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    @classmethod
+    def get(cls, name: str) -> "LocalQueue":
+        queue = cls._queues.get(name)
+        if queue is None:
+            directory = spool_directory()
+            os.makedirs(directory, exist_ok=True)
+            queue = cls._queues[name] = cls(name, directory)
+        return queue
+
+    @classmethod
+    def start_all(cls) -> List[str]:
+        """Start the consumers of the bound queues and of the queues left in the spool by a previous run."""
+        names = {func_info.queue_name for func_info in FunctionRegistry.queue_functions() if bound_functions(func_info.queue_name)}
+        directory = spool_directory()
+        if os.path.isdir(directory):
+            names.update(unquote(entry.removesuffix(".jsonl")) for entry in os.listdir(directory) if entry.endswith(".jsonl"))
+        for name in sorted(names):
+            cls.get(name).ensure_started()
+        return sorted(names)
+
+    @classmethod
+    def stats(cls) -> dict:
+        return {name: queue.describe() for name, queue in cls._queues.items()}
+
+    def _load(self):
+        """Rebuild the pending messages from the spool: enqueued and neither completed nor poisoned."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Última linha truncada por um crash
+                self.records += 1
+                if record["op"] == "enqueue":
+                    self.messages[record["id"]] = Message(record["id"], record["body"], record["insertion_time"], record.get("dequeue_count", 0))
+                elif record["op"] == "dequeue":
+                    if record["id"] in self.messages:
+                        self.messages[record["id"]].dequeue_count += 1
+                else:
+                    self.messages.pop(record["id"], None)
+        self.ready.extend(self.messages)
+        if self.messages:
+            log.info(f"Queue {self.name} restored {len(self.messages)} pending messages from {self.path}")
+        if self.records >= COMPACT_MIN_RECORDS and self.records > 2 * len(self.messages):
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the spool with only the pending messages."""
+        temporary = self.path + ".compact"
+        with open(temporary, "w", encoding="utf-8") as file:
+            for message in self.messages.values():
+                file.write(json.dumps(message.enqueue_record()) + "\n")
+        os.replace(temporary, self.path)
+        self.records = len(self.messages)
+
+    def _append(self, record: dict):
+        self.file.write(json.dumps(record) + "\n")
+        self.records += 1
+
+    def ensure_started(self):
+        """Create the consumer on the running event loop."""
+        if self.consumer is None:
+            self.wakeup = asyncio.Event()
+            self.consumer = asyncio.create_task(self.consume())
+
+    def enqueue(self, bodies: List[str]) -> List[str]:
+        """Spool the messages and wake the consumer; must run on the event loop thread."""
+        now = time.time()
+        ids = []
+        for body in bodies:
+            message = Message(str(uuid.uuid4()), body, now)
+            self.messages[message.id] = message
+            self._append(message.enqueue_record())
+            self.ready.append(message.id)
+            ids.append(message.id)
+        self.file.flush()
+        self.enqueued += len(ids)
+        self.ensure_started()
+        self.wakeup.set()
+        return ids
+
+    def _release_delayed(self) -> Optional[float]:
+        """Make visible the messages whose visibility timeout expired; seconds until the next one."""
+        now = time.monotonic()
+        while self.delayed and self.delayed[0][0] <= now:
+            _, message_id = heapq.heappop(self.delayed)
+            if message_id in self.messages:
+                self.ready.append(message_id)
+        return self.delayed[0][0] - now if self.delayed else None
+
+    async def consume(self):
+        while True:
+            self.wakeup.clear()
+            next_visible = self._release_delayed()
+            functions = bound_functions(self.name)
+            if functions and self.ready:
+                settings = QueueSettings.for_function(functions[0])
+                # Como o host do Azure: um novo lote só quando as mensagens em execução caem até newBatchThreshold
+                if self.in_flight <= settings.new_batch_threshold and self.dispatch_batch(functions, settings):
+                    continue
+
+            timeout = next_visible if functions else min(next_visible or UNBOUND_RECHECK_INTERVAL, UNBOUND_RECHECK_INTERVAL)
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def dispatch_batch(self, functions: List[FunctionInfo], settings: QueueSettings) -> int:
+        """Dequeue up to batch_size visible messages and run them, spreading them over the bound functions."""
+        count = min(settings.batch_size, settings.max_concurrency - self.in_flight, len(self.ready))
+        for _ in range(count):
+            message = self.messages[self.ready.popleft()]
+            message.dequeue_count += 1
+            self._append({"op": "dequeue", "id": message.id})
+            func_info = functions[self._next_function % len(functions)]
+            self._next_function += 1
+            self.in_flight += 1
+            task = asyncio.create_task(self.process(message, func_info, settings))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+        if count > 0:
+            self.file.flush()
+        return max(count, 0)
+
+    async def process(self, message: Message, func_info: FunctionInfo, settings: QueueSettings):
+        from proxy.queue_proxy import QueueProxy
+        try:
+            succeeded = await QueueProxy(None, self.name).execute_message(func_info, message)
+        except Exception as e:
+            log.error(f"Message {message.id} of queue {self.name} failed: {e}")
+            succeeded = False
+        finally:
+            self.in_flight -= 1
+
+        if succeeded:
+            self.complete(message)
+        elif message.dequeue_count >= settings.max_dequeue_count:
+            self.poison(message, settings.poison_queue)
+        else:
+            self.failed += 1
+            QUEUE_MESSAGES.inc(self.name, "failed")
+            if settings.visibility_timeout > 0:
+                heapq.heappush(self.delayed, (time.monotonic() + settings.visibility_timeout, message.id))
+            else:
+                self.ready.append(message.id)
+        self.wakeup.set()
+
+    def complete(self, message: Message):
+        self._remove(message, "complete")
+        self.completed += 1
+        QUEUE_MESSAGES.inc(self.name, "completed")
+        if self.records >= COMPACT_MIN_RECORDS and self.records > 4 * len(self.messages):
+            self.file.close()
+            self._compact()
+            self.file = open(self.path, "a", encoding="utf-8")
+
+    def poison(self, message: Message, poison_queue: str):
+        """Move a message that failed maxDequeueCount times to the poison queue."""
+        LocalQueue.get(poison_queue).enqueue([message.body])
+        self._remove(message, "poison")
+        self.poisoned += 1
+        QUEUE_MESSAGES.inc(self.name, "poisoned")
+        log.warning(f"Message {message.id} of queue {self.name} moved to {poison_queue} after {message.dequeue_count} attempts")
+
+    def _remove(self, message: Message, op: str):
+        self._append({"op": op, "id": message.id})
+        self.file.flush()
+        del self.messages[message.id]
+
+    def describe(self) -> dict:
+        return {
+            "length": len(self.messages),
+            "visible": len(self.ready),
+            "delayed": len(self.delayed),
+            "in_flight": self.in_flight,
+            "enqueued": self.enqueued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "poisoned": self.poisoned,
+            "functions": [f"{func_info.project}.{func_info.function_name}" for func_info in bound_functions(self.name)],
+            "spool": self.path
+        }
+
+metrics.Gauge(
+    "localrunner_local_queue_length",
+    "Messages pending in each local queue, including the ones in execution.",
+    ("queue",),
+    lambda: {(name,): len(queue.messages) for name, queue in LocalQueue._queues.items()}
+)
+metrics.Gauge(
+    "localrunner_local_queue_in_flight",
+    "Messages of each local queue currently being executed.",
+    ("queue",),
+    lambda: {(name,): queue.in_flight for name, queue in LocalQueue._queues.items()}
+)
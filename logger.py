@@ -0,0 +1,130 @@
+"""Logging of LocalRunner and of the functions, written by a background thread.
+
+Records are handed to a queue on the calling thread, which only renders the message arguments
+(no I/O and no formatting of the line there), and a QueueListener writes them to stdout as text
+or JSON lines (LOG_FORMAT), filtered by LOG_LEVEL.
+The invocation in progress lives in context variables, so every record logged while a function
+runs (including `logging.info` inside main) carries its invocation_id.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import atexit
+import logging
+import logging.handlers
+import contextvars
+import threading
+import queue
+from contextlib import contextmanager
+from typing import Optional
+
+INVOCATION_ID = contextvars.ContextVar("invocation_id", default=None)
+FUNCTION_NAME = contextvars.ContextVar("function_name", default=None)
+thread_local = threading.local()  # context.thread_local_storage: invocation_id em threads criadas pela função
+
+_listener = None
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"localrunner.{name}")
+
+def new_invocation_id() -> str:
+    return str(uuid.uuid4())
+
+@contextmanager
+def invocation(invocation_id: str, function_name: str):
+    """Bind the records logged inside the block to the invocation."""
+    id_token = INVOCATION_ID.set(invocation_id)
+    name_token = FUNCTION_NAME.set(function_name)
+    try:
+        yield
+    finally:
+        INVOCATION_ID.reset(id_token)
+        FUNCTION_NAME.reset(name_token)
+
+class InvocationQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves the formatting to the listener thread.
+
+    The default prepare formats the whole line on the calling thread; here only the invocation of the
+    context is captured and the `%` arguments are rendered into the message, since they may be mutated
+    after the call returns. Timestamps, levels and JSON are formatted by the listener.
+    """
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # SimpleQueue is thread safe: no need for the handler lock on the calling thread
+        if self.filter(record):
+            self.emit(record)
+        return True
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.invocation_id = INVOCATION_ID.get() or getattr(thread_local, "invocation_id", None)
+        record.function = FUNCTION_NAME.get()
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+class TextFormatter(logging.Formatter):
+    """Plain lines like the ones printed before, prefixed with the function and invocation when there is one."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        if getattr(record, "invocation_id", None):
+            message = f"[{record.function or 'invocation'} {record.invocation_id[:8]}] {message}"
+        if record.levelno >= logging.WARNING:
+            message = f"{record.levelname}: {message}"
+        return message
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "raw", False):
+            return record.getMessage()
+        entry = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "invocation_id": getattr(record, "invocation_id", None),
+            "function": getattr(record, "function", None),
+            "process": record.process,
+            "thread": record.threadName
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def formatter() -> logging.Formatter:
+    if is_json():
+        return JsonFormatter()
+    return TextFormatter("%(message)s")
+
+def is_json() -> bool:
+    return os.getenv("LOG_FORMAT", "text").lower() == "json"
+
+def setup():
+    """Route the root logger through the background writer; called once per process."""
+    global _listener
+    if _listener is not None:
+        return
+    records = queue.SimpleQueue()
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(formatter())
+    _listener = logging.handlers.QueueListener(records, stream, respect_handler_level=False)
+    _listener.start()
+    atexit.register(flush)
+
+    # Skip the stack walk for the caller file/line and the multiprocessing lookup of each record
+    logging._srcfile = None
+    logging.logMultiprocessing = False
+
+    root = logging.getLogger()
+    root.addHandler(InvocationQueueHandler(records))
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+def flush():
+    """Write the records still in the queue (at exit)."""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+def current_invocation_id() -> Optional[str]:
+    return INVOCATION_ID.get()
@@ -4,12 +4,16 @@ import uvicorn
 if __name__ == "__main__":
     project = os.getenv("PROJECT")
     function = os.getenv("FUNCTION")
-    port = int(os.getenv("PORT", 3000))  # Default to port 3000 if PORT is not set
+    port = int(os.getenv("WORKER_PORT") or os.getenv("PORT", 3000))  # Default to port 3000 if PORT is not set
+    uds = os.getenv("UDS")  # Unix socket of a worker started by the supervisor
     workspace_folder = os.getenv("PYTHONPATH", os.getcwd())  # Use PYTHONPATH as the workspace folder
     print(f"Workspace Folder: {workspace_folder}")
+    print(f"Execution Mode: {os.getenv('EXECUTION_MODE', 'inline')}")
 
     app_starter = None
-    if project and function:
+    if os.getenv("SUPERVISOR_CONFIG"):
+        app_starter = "apps.gateway_app:app"
+    elif project and function:
         app_starter = "apps.project_function_app:app"
     elif project:
         app_starter = "apps.project_app:app"
@@ -17,8 +21,13 @@ if __name__ == "__main__":
         app_starter = "apps.dynamic_app:app"
 
     print("Await for the application to start...")
-    uvicorn.run(
-        app_starter,
-        host="0.0.0.0",
-        port=port
-    )
\ No newline at end of file
+    if uds:
+        # The gateway keeps connections to its workers open between requests
+        uvicorn.run(app_starter, uds=uds, timeout_keep_alive=75)
+    else:
+        uvicorn.run(
+            app_starter,
+            host="0.0.0.0",
+            port=port,
+            timeout_keep_alive=75 if os.getenv("WORKER_PORT") else 5
+        )
\ No newline at end of file
@@ -0,0 +1,146 @@
+"""Memory growth of the executors across hot reloads, exposed at /_memory.
+
+Every reload done by ContextExecutionSingleton is measured: RSS and number of objects tracked by
+the gc before and after it (plus a tracemalloc diff with MEMORY_TRACEMALLOC). Old module objects
+that stay reachable make these numbers grow reload after reload. When the growth of an executor
+exceeds EXECUTOR_MEMORY_BUDGET_MB, the executor rebuilds its project from a clean sys.modules or
+restarts the process (EXECUTOR_MEMORY_BUDGET_ACTION).
+"""
+import os
+import sys
+import gc
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+import metrics
+import logger
+from logger import get_logger
+
+log = get_logger("memory_tracker")
+
+TOP_GROWTH_LINES = 10
+
+def rss_bytes() -> Optional[int]:
+    """Resident set size of the process (current on Linux, peak elsewhere)."""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+class MemoryTracker:
+    _executors: Dict[str, dict] = {}  # Crescimento por executor: "Project.Function" -> estatísticas
+    _lock = threading.Lock()
+
+    @staticmethod
+    def enabled() -> bool:
+        return os.getenv("MEMORY_TRACKING", "true").lower() == "true"
+
+    @staticmethod
+    def uses_tracemalloc() -> bool:
+        return os.getenv("MEMORY_TRACEMALLOC", "false").lower() == "true"
+
+    @staticmethod
+    def budget_bytes() -> int:
+        return int(float(os.getenv("EXECUTOR_MEMORY_BUDGET_MB", "0")) * 1024 * 1024)
+
+    @staticmethod
+    def budget_action() -> str:
+        """rebuild or restart (see EXECUTOR_MEMORY_BUDGET_ACTION)."""
+        return os.getenv("EXECUTOR_MEMORY_BUDGET_ACTION", "rebuild").lower()
+
+    @classmethod
+    @contextmanager
+    def measure(cls, keys: Iterable[str]):
+        """Record the memory taken by the reload done inside the block for each executor key."""
+        keys = list(keys)
+        if not keys or not cls.enabled():
+            yield
+            return
+
+        snapshot = None
+        if cls.uses_tracemalloc():
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            snapshot = tracemalloc.take_snapshot()
+        rss, objects = rss_bytes(), len(gc.get_objects())
+        yield
+        rss_growth = (rss_bytes() or 0) - (rss or 0)
+        objects_growth = len(gc.get_objects()) - objects
+        top_growth = None
+        if snapshot is not None and tracemalloc.is_tracing():
+            differences = tracemalloc.take_snapshot().compare_to(snapshot, "lineno")
+            top_growth = [
+                {"where": str(difference.traceback), "size_diff": difference.size_diff, "count_diff": difference.count_diff}
+                for difference in differences[:TOP_GROWTH_LINES] if difference.size_diff > 0
+            ]
+        cls.record(keys, rss_growth, objects_growth, top_growth)
+
+    @classmethod
+    def record(cls, keys: Iterable[str], rss_growth: int, objects_growth: int, top_growth: Optional[list] = None):
+        with cls._lock:
+            for key in keys:
+                stats = cls._executors.setdefault(key, {
+                    "reloads": 0, "rebuilds": 0, "rss_growth_bytes": 0, "objects_growth": 0,
+                    "total_rss_growth_bytes": 0, "last_reload": None, "top_growth": []
+                })
+                stats["reloads"] += 1
+                stats["rss_growth_bytes"] += rss_growth
+                stats["total_rss_growth_bytes"] += rss_growth
+                stats["objects_growth"] += objects_growth
+                stats["last_reload"] = time.time()
+                if top_growth is not None:
+                    stats["top_growth"] = top_growth
+
+    @classmethod
+    def over_budget(cls, keys: Iterable[str]) -> List[str]:
+        """Executors whose growth since their last rebuild exceeds EXECUTOR_MEMORY_BUDGET_MB."""
+        budget = cls.budget_bytes()
+        if budget <= 0:
+            return []
+        return [key for key in keys if cls._executors.get(key, {}).get("rss_growth_bytes", 0) > budget]
+
+    @classmethod
+    def rebuilt(cls, key: str):
+        """Start counting the growth of the executor again after a clean rebuild."""
+        with cls._lock:
+            stats = cls._executors.get(key)
+            if stats:
+                stats["rebuilds"] += 1
+                stats["rss_growth_bytes"] = 0
+                stats["objects_growth"] = 0
+
+    @staticmethod
+    def restart_process():
+        """Replace the process with a fresh one running the same command line."""
+        log.warning("Memory budget exceeded: restarting LocalRunner")
+        logger.flush()
+        os.execv(sys.executable, [sys.executable] + sys.argv)
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            executors = {key: dict(stats) for key, stats in cls._executors.items()}
+        return {
+            "rss_bytes": rss_bytes(),
+            "gc_objects": len(gc.get_objects()),
+            "budget_bytes": cls.budget_bytes(),
+            "budget_action": cls.budget_action(),
+            "tracemalloc": tracemalloc.is_tracing(),
+            "executors": executors
+        }
+
+metrics.Gauge(
+    "localrunner_executor_memory_growth_bytes",
+    "RSS growth measured around the hot reloads of each executor since its last rebuild.",
+    ("function",),
+    lambda: {(key,): stats["rss_growth_bytes"] for key, stats in MemoryTracker._executors.items()}
+)
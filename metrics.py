@@ -0,0 +1,119 @@
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+REGISTRY = []  # Métricas expostas em /metrics, na ordem de criação
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labelnames: Sequence[str], labels: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labels)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in list(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values: Dict[Tuple, list] = {}  # labels -> [contagem por bucket..., soma, total]
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * (len(self.buckets) + 3)
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, state in list(self._values.items()):
+            cumulative = 0
+            for bucket, count in zip(self.buckets, state):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{bucket}"')
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            bucket_labels = _format_labels(self.labelnames, labels, 'le="+Inf"')
+            yield f"{self.name}_bucket{bucket_labels} {state[-1]}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {state[-2]}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {state[-1]}"
+
+class Gauge:
+    """Gauge read at scrape time from a callback returning {labels: value}."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], callback: Callable[[], Dict[Tuple, float]]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        REGISTRY.append(self)
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} gauge"
+        for labels, value in self.callback().items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+
+def render() -> str:
+    """Prometheus text exposition format of every registered metric."""
+    return "\n".join(line for metric in REGISTRY for line in metric.collect()) + "\n"
+
+INVOCATIONS = Counter(
+    "localrunner_invocations_total",
+    "Function invocations by trigger type and status code.",
+    ("function", "trigger", "status")
+)
+INVOCATION_DURATION = Histogram(
+    "localrunner_invocation_duration_seconds",
+    "Duration of function invocations by trigger type and status code.",
+    ("function", "trigger", "status")
+)
+MODULE_RELOADS = Counter(
+    "localrunner_module_reloads_total",
+    "Modules reloaded by the executors.",
+    ("module",)
+)
+MODULE_RELOAD_DURATION = Histogram(
+    "localrunner_module_reload_duration_seconds",
+    "Duration of module reloads.",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+)
+FILE_WATCHER_EVENTS = Counter(
+    "localrunner_file_watcher_events_total",
+    "File system events received by the file watcher.",
+    ("event_type",)
+)
+
+def record_reload(module_name: str, seconds: float):
+    MODULE_RELOADS.inc(module_name)
+    MODULE_RELOAD_DURATION.observe(seconds)
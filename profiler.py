@@ -0,0 +1,160 @@
+import io
+import os
+import time
+import uuid
+import marshal
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from collections import OrderedDict
+from typing import Callable, Optional
+
+PROFILE_HEADER = "x-localrunner-profile"
+PROFILE_ID_HEADER = "x-localrunner-profile-id"
+PROFILE_KINDS = ("cpu", "mem")
+
+class ProfileStore:
+    """Ring buffer with the last profiles, retrievable from /_profiles/{id}."""
+
+    _profiles = OrderedDict()
+    _lock = threading.Lock()
+    _tracing_users = 0  # Perfis de memória em andamento que dependem do tracemalloc
+    _started_tracing = False  # Se o tracemalloc foi iniciado pelos perfis (e não por PYTHONTRACEMALLOC ou MemoryTracker)
+
+    @classmethod
+    def capacity(cls) -> int:
+        return int(os.getenv("PROFILE_BUFFER_SIZE", "20"))
+
+    @classmethod
+    def add(cls, profile: dict):
+        with cls._lock:
+            cls._profiles[profile["id"]] = profile
+            while len(cls._profiles) > cls.capacity():
+                cls._profiles.popitem(last=False)
+
+    @classmethod
+    def get(cls, profile_id: str) -> Optional[dict]:
+        return cls._profiles.get(profile_id)
+
+    @classmethod
+    def summary(cls) -> list:
+        return [
+            {key: value for key, value in profile.items() if key in ("id", "kind", "function", "created", "duration_ms")}
+            for profile in list(cls._profiles.values())
+        ]
+
+def _frame_name(func) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return f"{os.path.basename(filename)}:{name}:{line}"
+
+def collapsed_from_stats(stats: dict, max_depth: int = 64) -> str:
+    """Approximate folded stacks from the cProfile call graph, weighting each edge by its cumulative time."""
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    lines = {}
+
+    def walk(func, stack, fraction):
+        _, _, self_time, total_time, _ = stats[func]
+        stack = stack + [_frame_name(func)]
+        weight = round(self_time * fraction * 1_000_000)  # microseconds
+        if weight > 0:
+            key = ";".join(stack)
+            lines[key] = lines.get(key, 0) + weight
+        if len(stack) >= max_depth:
+            return
+        for callee, edge_time in callees.get(func, []):
+            callee_total = stats[callee][3]
+            if callee_total <= 0 or _frame_name(callee) in stack:
+                continue
+            walk(callee, stack, fraction * edge_time / callee_total)
+
+    roots = [func for func, (_, _, _, _, callers) in stats.items() if not callers]
+    for root in roots:
+        walk(root, [], 1.0)
+    return "\n".join(f"{stack} {weight}" for stack, weight in lines.items())
+
+def _profile_cpu(call: Callable, *args):
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        return call(*args), profile
+    finally:
+        profile.disable()
+
+def _cpu_report(profile: cProfile.Profile) -> dict:
+    profile.create_stats()
+    stats = profile.stats
+    text = io.StringIO()
+    # pstats.Stats consumes profile.stats, so the raw stats are serialized first
+    report = {"pstats": marshal.dumps(stats), "collapsed": collapsed_from_stats(stats)}
+    pstats.Stats(profile, stream=text).sort_stats("cumulative").print_stats(50)
+    return {"text": text.getvalue(), **report}
+
+def _profile_memory(call: Callable, *args):
+    with ProfileStore._lock:
+        if ProfileStore._tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(int(os.getenv("PROFILE_MEMORY_FRAMES", "25")))
+            ProfileStore._started_tracing = True
+        ProfileStore._tracing_users += 1
+
+    before = tracemalloc.take_snapshot()
+    try:
+        result = call(*args)
+        after = tracemalloc.take_snapshot()
+        return result, after.compare_to(before, "traceback")
+    finally:
+        with ProfileStore._lock:
+            ProfileStore._tracing_users -= 1
+            if ProfileStore._tracing_users == 0 and ProfileStore._started_tracing:
+                ProfileStore._started_tracing = False
+                tracemalloc.stop()
+
+def _memory_report(differences) -> dict:
+    growth = [difference for difference in differences if difference.size_diff > 0]
+    text = io.StringIO()
+    text.write(f"Allocated {sum(difference.size_diff for difference in growth)} bytes in {len(growth)} tracebacks\n\n")
+    for difference in growth[:30]:
+        text.write(f"{difference}\n")
+        for line in difference.traceback.format():
+            text.write(f"{line}\n")
+        text.write("\n")
+
+    collapsed = "\n".join(
+        ";".join(f"{os.path.basename(frame.filename)}:{frame.lineno}" for frame in difference.traceback) + f" {difference.size_diff}"
+        for difference in growth
+    )
+    return {"text": text.getvalue(), "collapsed": collapsed}
+
+def profiled(kind: str, label: str, call: Callable, on_profile: Callable[[str], None]) -> Callable:
+    """Wrap one main call with cProfile (cpu) or tracemalloc (mem) and store the result in the ring buffer."""
+
+    def run(*args):
+        profile_id = uuid.uuid4().hex[:12]
+        started = time.time()
+        start = time.perf_counter()
+        if kind == "mem":
+            result, differences = _profile_memory(call, *args)
+            report = _memory_report(differences)
+        else:
+            result, profile = _profile_cpu(call, *args)
+            report = _cpu_report(profile)
+
+        ProfileStore.add({
+            "id": profile_id,
+            "kind": kind,
+            "function": label,
+            "created": started,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+            **report
+        })
+        # Only stored profiles are advertised in the response header
+        on_profile(profile_id)
+        return result
+
+    return run
@@ -0,0 +1,124 @@
+import asyncio
+import metrics
+from typing import List, Optional
+from function_info import FunctionInfo
+from host_config import HostConfig
+
+THROTTLED = metrics.Counter(
+    "localrunner_http_throttled_total",
+    "HTTP requests answered with 429 because maxOutstandingRequests was reached.",
+    ("function",)
+)
+
+def _limit(value) -> int:
+    """host.json uses -1 for unbounded."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return -1
+
+class AdmissionGate:
+    """maxConcurrentRequests running at once and at most maxOutstandingRequests running or waiting."""
+
+    _gates = {}  # Limites por projeto (host.json) e por função (localRunner do function.json)
+
+    def __init__(self, key: str, max_concurrent: int, max_outstanding: int):
+        self.key = key
+        self.limits = (max_concurrent, max_outstanding)
+        self.semaphore = asyncio.Semaphore(max_concurrent) if max_concurrent > 0 else None
+        self.max_outstanding = max_outstanding
+        self.outstanding = 0
+        self.running = 0
+        self.rejected = 0
+
+    @classmethod
+    def get(cls, key: str, settings: dict) -> Optional["AdmissionGate"]:
+        limits = (_limit(settings.get("maxConcurrentRequests")), _limit(settings.get("maxOutstandingRequests")))
+        if limits[0] <= 0 and limits[1] <= 0:
+            cls._gates.pop(key, None)
+            return None
+        gate = cls._gates.get(key)
+        if gate is None or gate.limits != limits:
+            # Requests already admitted keep the gate they entered; host.json changes apply to the new ones
+            gate = cls._gates[key] = cls(key, *limits)
+        return gate
+
+    @classmethod
+    def for_function(cls, func_info: FunctionInfo) -> List["AdmissionGate"]:
+        """Gates of the function and of its project, in the order they are acquired."""
+        gates = [
+            cls.get(f"{func_info.project}.{func_info.function_name}", func_info.local_runner),
+            cls.get(func_info.project, HostConfig.extension(func_info.project, "http"))
+        ]
+        return [gate for gate in gates if gate is not None]
+
+    @classmethod
+    def stats(cls) -> dict:
+        return {key: gate.describe() for key, gate in cls._gates.items()}
+
+    def has_room(self) -> bool:
+        return self.max_outstanding <= 0 or self.outstanding < self.max_outstanding
+
+    async def acquire(self):
+        if self.semaphore is not None:
+            await self.semaphore.acquire()
+        self.running += 1
+
+    def release(self, acquired: bool):
+        if acquired:
+            self.running -= 1
+            if self.semaphore is not None:
+                self.semaphore.release()
+        self.outstanding -= 1
+
+    def describe(self) -> dict:
+        return {
+            "maxConcurrentRequests": self.limits[0],
+            "maxOutstandingRequests": self.limits[1],
+            "running": self.running,
+            "waiting": self.outstanding - self.running,
+            "rejected": self.rejected
+        }
+
+class Admission:
+    """Async context that holds a slot in every gate of a request, or rejects it when one is full."""
+
+    def __init__(self, func_info: FunctionInfo):
+        self.name = f"{func_info.project}.{func_info.function_name}"
+        self.gates = AdmissionGate.for_function(func_info)
+        self.acquired = []
+
+    def admit(self) -> bool:
+        """Reserve a place in every gate at once; False when any of them has no room (429)."""
+        full = [gate for gate in self.gates if not gate.has_room()]
+        if full:
+            for gate in full:
+                gate.rejected += 1
+            THROTTLED.inc(self.name)
+            return False
+        for gate in self.gates:
+            gate.outstanding += 1
+        return True
+
+    async def __aenter__(self):
+        # The function slot first, so a request waiting for it does not hold a slot of the whole project
+        try:
+            for gate in self.gates:
+                await gate.acquire()
+                self.acquired.append(gate)
+        except BaseException:
+            await self.__aexit__(None, None, None)
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info):
+        for gate in self.gates:
+            gate.release(gate in self.acquired)
+        self.acquired = []
+
+metrics.Gauge(
+    "localrunner_http_outstanding_requests",
+    "HTTP requests running or waiting in each admission gate (project or Project.Function).",
+    ("scope",),
+    lambda: {(key,): gate.outstanding for key, gate in AdmissionGate._gates.items()}
+)
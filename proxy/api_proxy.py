@@ -1,25 +1,55 @@
+import os
 from fastapi import Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import azure.functions as func
 from proxy.base_proxy import BaseProxy
+from function_registry import FunctionRegistry
+from route_table import RouteTable
+from starlette.background import BackgroundTask
 from LocalRunner.azure_request_type.http_request import AzureHttpRequest
-from utils import parse_path_to_function_name, azure_response_to_fastapi
+from LocalRunner.azure_request_type.spooled_body import SpooledBody
+from response_cache import ResponseCache, CACHE_HEADER, CACHE_LOOKUPS, parse_cache_control, cached_response, conditional_response
+from profiler import PROFILE_HEADER
+from utils import parse_path_to_function_name, azure_response_to_fastapi, is_streamable, streaming_response
 
 class APIProxy(BaseProxy):
     def __init__(self, request: Request, path: str):
         super().__init__(request, path)
+        self.route_params = {}
 
     async def load_function_info(self, function_path: str):
-        """Load the function info and extract the remaining path."""
+        """Load the function info and match the remaining path against its route."""
         # Usar parse_path_to_function_name para separar o path
         project, function_name, remaining_path = parse_path_to_function_name(function_path)
-        if not project or not function_name:
+        azure_routes = RouteTable.azure_routes_enabled()
+        if (not project or not function_name) and not azure_routes:
             return JSONResponse(
                 status_code=400,
                 content={"error": f"Invalid Path: '{function_path}'. Use the format Project.Function"}
             )
 
-        return await super().load_function_info(f"{project}.{function_name}")
+        func_info = FunctionRegistry.get(project, function_name, fallback=not azure_routes) if function_name else None
+        if func_info:
+            route_params = RouteTable.match_function(project, function_name, "/".join(remaining_path))
+            if route_params is None:
+                return JSONResponse(
+                    status_code=404,
+                    content={"error": f"Path '/{'/'.join(part for part in remaining_path if part)}' does not match the route '{func_info.route}' of '{project}.{function_name}'"}
+                )
+            self.route_params = route_params
+            return func_info
+
+        # Azure host style: /api/<route> without the Project.Function prefix
+        if azure_routes:
+            found = RouteTable.resolve(self.request.url.path.removeprefix("/api"), os.getenv("PROJECT"))
+            if found:
+                func_info, self.route_params = found
+                return func_info
+
+        return JSONResponse(
+            status_code=404,
+            content={"error": f"Function '{project}.{function_name}' not found"}
+        )
 
     async def validate(self, func_info):
         """Validate the HTTP request against the function info."""
@@ -39,13 +69,65 @@ class APIProxy(BaseProxy):
         return None
 
     async def execution(self, func_info):
+        """Execute the HTTP function, answering from the response cache when it is enabled for the function."""
+        config = ResponseCache.config_for(func_info)
+        if config is None or self.request.method not in config.methods:
+            return await self.execute_function(func_info)
+
+        name = f"{func_info.project}.{func_info.function_name}"
+        request_directives = parse_cache_control(self.request.headers.get("cache-control"))
+        if "no-store" in request_directives or self.request.headers.get(PROFILE_HEADER):
+            CACHE_LOOKUPS.inc(name, "bypass")
+            return await self.execute_function(func_info)
+
+        base_key = ResponseCache.base_key(func_info, config, self.request, self.route_params)
+        if "no-cache" not in request_directives:
+            entry = ResponseCache.lookup(ResponseCache.key_for(base_key, self.request))
+            if entry is not None:
+                response = cached_response(entry, self.request)
+                CACHE_LOOKUPS.inc(name, "not_modified" if response.status_code == 304 else "hit")
+                response.headers[CACHE_HEADER] = "HIT"
+                return response
+
+        CACHE_LOOKUPS.inc(name, "miss")
+        response = await self.execute_function(func_info)
+        if ResponseCache.store(base_key, self.request, config, func_info, response):
+            response = conditional_response(response, self.request)
+        if hasattr(response, "headers"):
+            response.headers[CACHE_HEADER] = "MISS"
+        return response
+
+    async def execute_function(self, func_info):
+        """Execute the HTTP function once it is admitted by the concurrency limits."""
+        admission = self.admission(func_info)
+        if not admission.admit():
+            return self.too_many_requests(func_info)
+        async with admission:
+            return await self.run_function(func_info)
+
+    async def run_function(self, func_info):
         """Execute the HTTP function."""
-        # Create the AzureHttpRequest object
-        body = await self.request.body()
-        azure_request = AzureHttpRequest(self.request, body, func_info)
-        await azure_request.setup()
-
-        result = await super().execution(azure_request, func_info)
-        if not isinstance(result, func.HttpResponse):
-            return result
-        return azure_response_to_fastapi(result)
\ No newline at end of file
+        # Large bodies are spooled to a temporary file instead of being kept in memory
+        body = await SpooledBody.from_request(self.request)
+        try:
+            azure_request = AzureHttpRequest(self.request, body.data, func_info, self.route_params, body_path=body.path)
+            await azure_request.setup()
+
+            result = await super().execution(azure_request, func_info)
+            if isinstance(result, func.HttpResponse):
+                response = azure_response_to_fastapi(result)
+            elif is_streamable(result):
+                response = streaming_response(result)
+            else:
+                response = result
+        except BaseException:
+            body.close()
+            raise
+
+        if body.is_spooled:
+            if isinstance(response, Response) and response.background is None:
+                # The response may still read from the body while it is sent
+                response.background = BackgroundTask(body.close)
+            else:
+                body.close()
+        return response
\ No newline at end of file
@@ -1,12 +1,29 @@
+import os
+import time
+import asyncio
+import contextvars
+import metrics
+import logger
+from contextlib import nullcontext
 from fastapi import Request
 from fastapi.responses import JSONResponse
-from function_info import FunctionInfo, find_function_info
+from function_info import FunctionInfo
+from function_registry import FunctionRegistry
 from context_execution_singleton import ContextExecutionSingleton as executor
+from worker_pool import WorkerPool
+from proxy.admission import Admission
+from LocalRunner.azure_request_type.invocation_context import InvocationContext
+from profiler import PROFILE_HEADER, PROFILE_ID_HEADER, PROFILE_KINDS, profiled
+
+log = logger.get_logger("base_proxy")
 
 class BaseProxy:
+    _async_slots = {}  # Semáforos das funções async, por Project.Function
+
     def __init__(self, request: Request, path: str):
         self.request = request
         self.path = path
+        self.profile_ids = []
 
     async def proxy_function(self):
         """Main proxy function to handle the request."""
@@ -21,11 +38,14 @@ class BaseProxy:
             return validation_error
 
         # Execute the function
-        return await self.execution(func_info)
+        response = await self.execution(func_info)
+        if self.profile_ids and hasattr(response, "headers"):
+            response.headers[PROFILE_ID_HEADER] = ",".join(self.profile_ids)
+        return response
 
     async def load_function_info(self, function_path: str) -> FunctionInfo:
         """Load the function info based on the function path."""
-        func_info = find_function_info(function_path.split(".")[0], function_path.split(".")[1])
+        func_info = FunctionRegistry.get(function_path.split(".")[0], function_path.split(".")[1])
         if not func_info:
             return JSONResponse(
                 status_code=404,
@@ -38,18 +58,77 @@ class BaseProxy:
         # This method is intentionally left blank for subclasses to implement specific validations
         return None
 
-    async def execution(self, azure_request, func_info: FunctionInfo):
-        """Execute the function."""
-        # Create the Azure Function context
+    async def execution(self, azure_request, func_info: FunctionInfo, timeout=None, offload=False):
+        """Execute the function and record its invocation metrics."""
+        start = time.perf_counter()
+        status = 504  # wait_for cancels the execution when the timeout expires
+        context = InvocationContext.create(func_info, self.request.headers if self.request is not None else None)
         try:
-            return executor.load(
-                project_dir=func_info.project,
-                main_module=f"{func_info.function_name}.{func_info.script_file}".removesuffix(".py")
-            ).execute(azure_request)
+            with logger.invocation(context.invocation_id, f"{func_info.project}.{func_info.function_name}"):
+                result = await self.invoke(azure_request, func_info, timeout, offload, context)
+            status = getattr(result, "status_code", 200)
+            return result
+        finally:
+            labels = (f"{func_info.project}.{func_info.function_name}", func_info.trigger, str(status))
+            metrics.INVOCATIONS.inc(*labels)
+            metrics.INVOCATION_DURATION.observe(time.perf_counter() - start, *labels)
+
+    async def invoke(self, azure_request, func_info: FunctionInfo, timeout=None, offload=False, context: InvocationContext = None):
+        """Invoke main; offload runs synchronous code on the thread pool even in inline mode."""
+        try:
+            if executor.is_process_mode():
+                return await WorkerPool.for_function(func_info.project, func_info.function_name).execute(
+                    func_info.project, func_info.main_module, func_info.trigger, azure_request.to_payload(), timeout,
+                    context.to_payload() if context else None
+                )
+
+            instance = await executor.aload(project_dir=func_info.project, main_module=func_info.main_module)
+            # Offloaded calls in inline mode do not hold the cwd lock while they run
+            execute = instance.execute_isolated if offload and not executor.is_thread_mode() else instance.execute
+            call = self.with_profiler(execute, func_info)
+            if call is execute and instance.is_async():
+                # async def main runs on the server loop; profiled calls go to the thread pool below
+                async with self.async_slot(func_info):
+                    return await instance.aexecute(azure_request, context)
+            if offload or executor.is_thread_mode() or instance.is_async():
+                loop = asyncio.get_running_loop()
+                # The thread keeps the invocation of the logs
+                run = contextvars.copy_context().run
+                return await loop.run_in_executor(executor.thread_pool(), run, call, azure_request, context)
+            return call(azure_request, context)
         except Exception as e:
-            import traceback
-            traceback.print_exc()
+            log.exception("Function execution failed")
             return JSONResponse(
                 status_code=500,
                 content={"error": f"Function execution failed: {str(e)}"}
-            )
\ No newline at end of file
+            )
+
+    @staticmethod
+    def admission(func_info: FunctionInfo) -> Admission:
+        """Slots of the function and project limits (localRunner and host.json http.maxConcurrentRequests/maxOutstandingRequests)."""
+        return Admission(func_info)
+
+    @staticmethod
+    def too_many_requests(func_info: FunctionInfo) -> JSONResponse:
+        return JSONResponse(
+            status_code=429,
+            content={"error": f"Too many outstanding requests for '{func_info.project}.{func_info.function_name}'"},
+            headers={"Retry-After": "1"}
+        )
+
+    @classmethod
+    def async_slot(cls, func_info: FunctionInfo):
+        """Limit of concurrent calls of an async function (localRunner.maxConcurrency or ASYNC_FUNCTION_CONCURRENCY)."""
+        key = f"{func_info.project}.{func_info.function_name}"
+        limit = int(func_info.local_runner.get("maxConcurrency") or os.getenv("ASYNC_FUNCTION_CONCURRENCY", "0"))
+        slot = cls._async_slots.get(key)
+        if slot is None or slot[0] != limit:
+            slot = cls._async_slots[key] = (limit, asyncio.Semaphore(limit) if limit > 0 else nullcontext())
+        return slot[1]
+
+    def with_profiler(self, call, func_info: FunctionInfo):
+        """Wrap the call with a profiler when the request asks for one (x-localrunner-profile: cpu|mem)."""
+        kind = self.request.headers.get(PROFILE_HEADER) if self.request is not None else None
+        if not kind or kind.lower() not in PROFILE_KINDS:
+            return call
+        return profiled(kind.lower(), f"{func_info.project}.{func_info.function_name}", call, self.profile_ids.append)
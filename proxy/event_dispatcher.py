@@ -0,0 +1,120 @@
+import os
+import math
+import time
+import asyncio
+import metrics
+from typing import Awaitable, Callable, List
+from logger import get_logger
+
+log = get_logger("event_dispatcher")
+
+class EventDispatcher:
+    """Bounded queue of pending events of one function, drained by a fixed pool of consumers."""
+
+    _dispatchers = {}  # Filas por função, identificadas por PROJECT.FUNCTION
+    loop = None  # Event loop do servidor, usado pelo local_event_bus a partir de outras threads
+
+    def __init__(self, key: str, maxsize: int, consumers: int):
+        self.key = key
+        self.maxsize = maxsize
+        self.consumers = consumers
+        self.queue = None
+        self.tasks = []
+        self.in_flight = 0
+        self.processed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.average_duration = 0.0
+
+    @classmethod
+    def for_function(cls, func_info) -> "EventDispatcher":
+        key = f"{func_info.project}.{func_info.function_name}"
+        if key not in cls._dispatchers:
+            cls._dispatchers[key] = cls(
+                key,
+                maxsize=int(os.getenv("EVENT_QUEUE_SIZE", "1000")),
+                consumers=int(os.getenv("EVENT_QUEUE_CONSUMERS", "4"))
+            )
+        return cls._dispatchers[key]
+
+    @classmethod
+    def bind_loop(cls, loop: asyncio.AbstractEventLoop):
+        cls.loop = loop
+
+    @classmethod
+    def stats(cls) -> dict:
+        return {key: dispatcher.describe() for key, dispatcher in cls._dispatchers.items()}
+
+    def ensure_started(self):
+        """Create the queue and the consumers on the running event loop."""
+        if self.queue is None:
+            self.queue = asyncio.Queue(maxsize=self.maxsize)
+            self.tasks = [asyncio.create_task(self.consume()) for _ in range(self.consumers)]
+
+    @property
+    def depth(self) -> int:
+        return self.queue.qsize() if self.queue else 0
+
+    def retry_after(self) -> int:
+        """Seconds the queue needs to drain at the current pace."""
+        return max(1, math.ceil(self.depth * self.average_duration / self.consumers))
+
+    def submit(self, jobs: List[Callable[[], Awaitable]]) -> bool:
+        """Enqueue the whole batch, or nothing if it does not fit."""
+        self.ensure_started()
+        if self.maxsize - self.queue.qsize() < len(jobs):
+            return False
+        for job in jobs:
+            self.queue.put_nowait(job)
+        return True
+
+    async def put(self, job: Callable[[], Awaitable]):
+        """Enqueue one job, waiting for room in the queue (backpressure of streamed batches)."""
+        self.ensure_started()
+        await self.queue.put(job)
+
+    async def consume(self):
+        while True:
+            job = await self.queue.get()
+            self.in_flight += 1
+            start = time.perf_counter()
+            try:
+                result = await job()
+                if getattr(result, "status_code", 200) >= 400:
+                    self.failed += 1
+            except asyncio.TimeoutError as e:
+                self.timed_out += 1
+                log.warning(f"Event of {self.key} timed out: {e}")
+            except Exception as e:
+                self.failed += 1
+                log.error(f"Unexpected error in function {self.key}: {e}")
+            finally:
+                duration = time.perf_counter() - start
+                self.average_duration = duration if not self.processed else 0.9 * self.average_duration + 0.1 * duration
+                self.processed += 1
+                self.in_flight -= 1
+                self.queue.task_done()
+
+    def describe(self) -> dict:
+        return {
+            "depth": self.depth,
+            "maxsize": self.maxsize,
+            "consumers": self.consumers,
+            "in_flight": self.in_flight,
+            "processed": self.processed,
+            "failed": self.failed,
+            "timed_out": self.timed_out
+        }
+
+metrics.Gauge(
+    "localrunner_event_queue_depth",
+    "Events waiting in the dispatch queue of each function.",
+    ("function",),
+    lambda: {(key,): dispatcher.depth for key, dispatcher in EventDispatcher._dispatchers.items()}
+)
+metrics.Gauge(
+    "localrunner_event_tasks_in_flight",
+    "Events of each function currently being executed.",
+    ("function",),
+    lambda: {(key,): dispatcher.in_flight for key, dispatcher in EventDispatcher._dispatchers.items()}
+)
@@ -1,8 +1,12 @@
+import os
 import asyncio
+from functools import partial
 from fastapi import Request, BackgroundTasks
 from fastapi.responses import JSONResponse
 from proxy.base_proxy import BaseProxy
-from LocalRunner.azure_request_type.event_request import EventRequest
+from proxy.event_dispatcher import EventDispatcher
+from LocalRunner.azure_request_type.event_request import EventRequest, binary_cloud_event, is_cloud_event
+from json_stream import JsonArrayParser
 from utils import parse_path_to_function_name
 
 class EventProxy(BaseProxy):
@@ -34,14 +38,6 @@ class EventProxy(BaseProxy):
 
     async def execution(self, func_info):
         """Execute the Event function."""
-        body = await self.request.json()
-
-        if not isinstance(body, list):
-            return JSONResponse(
-                status_code=400,
-                content={"error": "Request body must be a list."}
-            )
-
         sync_header = self.request.headers.get("sync", "false").lower()
         timeout_header = self.request.headers.get("timeout", "300")
         try:
@@ -49,11 +45,77 @@ class EventProxy(BaseProxy):
         except ValueError:
             timeout = 300  # Default to 5 minutes if the header is not a valid integer
 
+        if "ce-specversion" in self.request.headers:
+            # CloudEvents binary mode: a single event whose data is the body
+            try:
+                body = [binary_cloud_event(self.request.headers, await self.request.body())]
+            except ValueError:
+                return JSONResponse(status_code=400, content={"error": "Invalid JSON body."})
+        elif sync_header == "true" or self.is_small_body():
+            try:
+                body = await self.request.json()
+            except ValueError:
+                return JSONResponse(status_code=400, content={"error": "Invalid JSON body."})
+            if is_cloud_event(body):
+                body = [body]  # CloudEvents structured mode
+        else:
+            return await self._execute_streaming(func_info, timeout)
+
+        if not isinstance(body, list):
+            return JSONResponse(
+                status_code=400,
+                content={"error": "Request body must be a list."}
+            )
+        if not all(isinstance(item, dict) for item in body):
+            return JSONResponse(
+                status_code=400,
+                content={"error": "Each event must be a JSON object."}
+            )
+
         if sync_header == "true":
             return await self._execute_sync_mode(func_info, body, timeout)
         else:
             return await self._execute_async_mode(func_info, body, timeout)
 
+    def is_small_body(self) -> bool:
+        """Bodies up to EVENT_STREAM_THRESHOLD bytes are parsed at once; bigger or chunked ones are streamed."""
+        length = self.request.headers.get("content-length")
+        threshold = int(os.getenv("EVENT_STREAM_THRESHOLD", str(1024 * 1024)))
+        return length is not None and length.isdigit() and int(length) <= threshold
+
+    async def _execute_streaming(self, func_info, timeout):
+        """Dispatch each event as soon as it is parsed, waiting for room in the queue when it is full."""
+        dispatcher = EventDispatcher.for_function(func_info)
+        parser = JsonArrayParser()
+        accepted = 0
+        try:
+            async for chunk in self.request.stream():
+                for item in parser.feed(chunk):
+                    accepted += await self._put_event(dispatcher, item, func_info, timeout)
+            items = parser.close()
+            if parser.is_object and not is_cloud_event(items[0]):
+                # Same rule of the buffered path: only a CloudEvent may come without the array
+                raise ValueError("Request body must be a list.")
+            for item in items:
+                accepted += await self._put_event(dispatcher, item, func_info, timeout)
+        except ValueError as e:
+            # The events before the error are already in the queue
+            return JSONResponse(
+                status_code=400,
+                content={"error": str(e), "accepted": accepted}
+            )
+
+        return JSONResponse(
+            content={"status": "accepted", "events": accepted, "queueDepth": dispatcher.depth},
+            status_code=200
+        )
+
+    async def _put_event(self, dispatcher, item, func_info, timeout) -> int:
+        if not isinstance(item, dict):
+            raise ValueError("Each event must be a JSON object.")
+        await dispatcher.put(partial(self.execute_event, item, func_info, timeout))
+        return 1
+
     async def _execute_sync_mode(self, func_info, body, timeout):
         """Execute function in synchronous mode."""
         # Synchronous mode: only allow a single item in the list
@@ -64,33 +126,45 @@ class EventProxy(BaseProxy):
             )
 
         event_request = EventRequest(body[0])
-        await self.execute_function_with_timeout(event_request, func_info, timeout)
+        try:
+            result = await self.execute_function_with_timeout(event_request, func_info, timeout)
+        except asyncio.TimeoutError as e:
+            return JSONResponse(status_code=504, content={"error": str(e)})
+        if isinstance(result, JSONResponse):
+            return result
         return JSONResponse(content=[{"status": "completed"}], status_code=200)
         
     async def _execute_async_mode(self, func_info, body, timeout):
         """Execute function in asynchronous mode."""
-        
-        tasks = []
-        for item in body:
-            event_request = EventRequest(item)
-            task = asyncio.create_task(
-            self.execute_function_with_timeout(event_request, func_info, timeout)
+        return self.enqueue(func_info, body, timeout)
+
+    def enqueue(self, func_info, body, timeout):
+        """Hand the events to the dispatch queue of the function; must run on the event loop thread."""
+        dispatcher = EventDispatcher.for_function(func_info)
+        jobs = [
+            partial(self.execute_event, item, func_info, timeout)
+            for item in body
+        ]
+        if not dispatcher.submit(jobs):
+            return JSONResponse(
+                status_code=429,
+                content={"error": f"Event queue of '{dispatcher.key}' is full", "queueDepth": dispatcher.depth},
+                headers={"Retry-After": str(dispatcher.retry_after())}
             )
-            tasks.append(task)
-        
+
         # Return immediately with a simple acceptance response
         return JSONResponse(
-            content={"status": "accepted" }, 
+            content={"status": "accepted", "queueDepth": dispatcher.depth}, 
             status_code=200
         )
         
+    async def execute_event(self, event, func_info, timeout=300):
+        """Build the EventRequest only when a consumer picks the event, so the queue holds plain dicts."""
+        return await self.execute_function_with_timeout(EventRequest(event), func_info, timeout)
+
     async def execute_function_with_timeout(self, event_request, func_info, timeout=300):
-        """Execute function with a timeout."""
+        """Execute function with a timeout, running it off the event loop so the timeout can fire."""
         try:
-            asyncio.create_task(
-                asyncio.wait_for(super().execution(event_request, func_info), timeout)
-            )
+            return await asyncio.wait_for(super().execution(event_request, func_info, timeout, offload=True), timeout)
         except asyncio.TimeoutError:
-            print(f"Execution of function {func_info.function_name} exceeded the time limit of {timeout} seconds")
-        except Exception as e:
-            print(f"Unexpected error in function {func_info.function_name}: {e}")
\ No newline at end of file
+            raise asyncio.TimeoutError(f"Execution of function {func_info.function_name} exceeded the time limit of {timeout} seconds")
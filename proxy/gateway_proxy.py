@@ -0,0 +1,158 @@
+import time
+import asyncio
+import h11
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from supervisor import ProjectWorker
+
+# Cabeçalhos que valem só para uma conexão e não são repassados
+HOP_BY_HOP_HEADERS = {b"connection", b"keep-alive", b"proxy-authenticate", b"proxy-authorization", b"te", b"trailer", b"upgrade"}
+BUFFERED_RESPONSE_LIMIT = 64 * 1024
+IDLE_CONNECTION_TTL = 60  # Os workers usam keep-alive de 75s
+WORKER_READY_TIMEOUT = 30
+
+class UpstreamConnection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.h11 = h11.Connection(our_role=h11.CLIENT)
+        self.idle_since = time.monotonic()
+
+    async def send(self, event):
+        data = self.h11.send(event)
+        if data:
+            self.writer.write(data)
+            await self.writer.drain()
+
+    async def next_event(self):
+        while True:
+            event = self.h11.next_event()
+            if event is not h11.NEED_DATA:
+                return event
+            self.h11.receive_data(await self.reader.read(65536))
+
+    def reusable(self) -> bool:
+        return self.h11.our_state is h11.DONE and self.h11.their_state is h11.DONE
+
+    def close(self):
+        self.writer.close()
+
+class UpstreamPool:
+    """Idle keep-alive connections to each worker."""
+
+    _idle = {}  # Conexões ociosas por projeto
+
+    @classmethod
+    async def acquire(cls, worker: ProjectWorker) -> UpstreamConnection:
+        idle = cls._idle.setdefault(worker.project, [])
+        while idle:
+            connection = idle.pop()
+            if connection.reader.at_eof() or time.monotonic() - connection.idle_since > IDLE_CONNECTION_TTL:
+                connection.close()
+                continue
+            return connection
+        return UpstreamConnection(*await worker.open_connection())
+
+    @classmethod
+    def release(cls, worker: ProjectWorker, connection: UpstreamConnection):
+        if not connection.reusable():
+            connection.close()
+            return
+        connection.h11.start_next_cycle()
+        connection.idle_since = time.monotonic()
+        cls._idle.setdefault(worker.project, []).append(connection)
+
+class GatewayProxy:
+    """Forward a request to the worker of its project, streaming the bodies in both directions."""
+
+    def __init__(self, request: Request, worker: ProjectWorker, target: str, body: bytes = None):
+        self.request = request
+        self.worker = worker
+        self.body = body  # Corpo já lido, quando a mesma requisição vai para vários workers
+        self.target = target + (f"?{request.url.query}" if request.url.query else "")
+
+    async def forward(self):
+        try:
+            # Requests that arrive while the worker restarts wait for it
+            await asyncio.wait_for(self.worker.ready.wait(), WORKER_READY_TIMEOUT)
+        except asyncio.TimeoutError:
+            return JSONResponse(status_code=503, content={"error": f"Worker of project '{self.worker.project}' is not running"})
+        try:
+            connection = await UpstreamPool.acquire(self.worker)
+        except OSError as e:
+            return JSONResponse(status_code=503, content={"error": f"Worker of project '{self.worker.project}' is not reachable: {e}"})
+
+        try:
+            await self.send_request(connection)
+            response = await connection.next_event()
+            while isinstance(response, h11.InformationalResponse):
+                response = await connection.next_event()
+            if not isinstance(response, h11.Response):
+                raise h11.RemoteProtocolError(f"Unexpected event from worker: {response}")
+            return await self.build_response(connection, response)
+        except (h11.ProtocolError, OSError, asyncio.IncompleteReadError) as e:
+            connection.close()
+            return JSONResponse(status_code=502, content={"error": f"Worker of project '{self.worker.project}' failed: {e}"})
+        except BaseException:
+            connection.close()
+            raise
+
+    async def send_request(self, connection: UpstreamConnection):
+        headers = [(name, value) for name, value in self.request.headers.raw if name.lower() not in HOP_BY_HOP_HEADERS]
+        if self.body is not None:
+            headers = [(name, value) for name, value in headers if name.lower() not in (b"content-length", b"transfer-encoding")]
+            headers.append((b"content-length", str(len(self.body)).encode()))
+        has_body = any(name.lower() in (b"content-length", b"transfer-encoding") for name, _ in headers)
+        await connection.send(h11.Request(method=self.request.method, target=self.target, headers=headers))
+        if self.body:
+            await connection.send(h11.Data(data=self.body))
+        elif has_body and self.body is None:
+            async for chunk in self.request.stream():
+                if chunk:
+                    await connection.send(h11.Data(data=chunk))
+        await connection.send(h11.EndOfMessage())
+
+    async def build_response(self, connection: UpstreamConnection, response: h11.Response):
+        headers = [
+            (name, value) for name, value in response.headers
+            if name.lower() not in HOP_BY_HOP_HEADERS and name.lower() != b"transfer-encoding"
+        ]
+
+        # Respostas pequenas são lidas inteiras; as grandes seguem em stream
+        chunks, size = [], 0
+        while size <= BUFFERED_RESPONSE_LIMIT:
+            event = await connection.next_event()
+            if isinstance(event, h11.EndOfMessage):
+                UpstreamPool.release(self.worker, connection)
+                result = Response(content=b"".join(chunks), status_code=response.status_code)
+                result.raw_headers = headers
+                return result
+            if isinstance(event, h11.Data):
+                chunks.append(bytes(event.data))
+                size += len(event.data)
+            elif isinstance(event, h11.ConnectionClosed):
+                raise h11.RemoteProtocolError("Worker closed the connection during the response")
+
+        result = StreamingResponse(self.stream_rest(connection, chunks), status_code=response.status_code)
+        result.raw_headers = headers
+        return result
+
+    async def stream_rest(self, connection: UpstreamConnection, chunks):
+        completed = False
+        try:
+            for chunk in chunks:
+                yield chunk
+            while True:
+                event = await connection.next_event()
+                if isinstance(event, h11.EndOfMessage):
+                    completed = True
+                    return
+                if isinstance(event, h11.ConnectionClosed):
+                    return
+                if isinstance(event, h11.Data):
+                    yield bytes(event.data)
+        finally:
+            if completed:
+                UpstreamPool.release(self.worker, connection)
+            else:
+                connection.close()
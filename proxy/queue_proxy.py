@@ -0,0 +1,56 @@
+import json
+import asyncio
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from proxy.base_proxy import BaseProxy
+from function_info import FunctionInfo
+from host_config import HostConfig
+from local_queue import LocalQueue, Message, queues_for
+from LocalRunner.azure_request_type.queue_request import build_queue_request
+from logger import get_logger
+
+log = get_logger("queue_proxy")
+
+class QueueProxy(BaseProxy):
+    """Enqueue endpoint of the local queues and execution of their messages."""
+
+    def __init__(self, request: Request, queue_name: str):
+        super().__init__(request, queue_name)
+        self.queue_name = queue_name
+
+    async def enqueue(self):
+        """Spool the body as messages of the queue (or of every subscription of a topic)."""
+        names = queues_for(self.queue_name)
+        if not names:
+            return JSONResponse(
+                status_code=404,
+                content={"error": f"No queueTrigger or serviceBusTrigger function is bound to '{self.queue_name}'"}
+            )
+
+        body = await self.request.body()
+        messages = [body.decode("utf-8", errors="replace")]
+        if "json" in self.request.headers.get("content-type", ""):
+            try:
+                items = json.loads(body)
+            except ValueError:
+                return JSONResponse(status_code=400, content={"error": "Invalid JSON body."})
+            # A JSON list is a batch; each item is one message
+            if isinstance(items, list):
+                messages = [item if isinstance(item, str) else json.dumps(item) for item in items]
+
+        accepted = {}
+        for name in names:
+            queue = LocalQueue.get(name)
+            accepted[name] = {"messageIds": queue.enqueue(messages), "queueLength": len(queue.messages)}
+        return JSONResponse(content={"status": "accepted", "queues": accepted}, status_code=200)
+
+    async def execute_message(self, func_info: FunctionInfo, message: Message) -> bool:
+        """Run the function with the message; False when it fails or exceeds the functionTimeout of host.json."""
+        queue_request = build_queue_request(message.to_payload(func_info.queue_trigger))
+        timeout = HostConfig.function_timeout(func_info.project)
+        try:
+            result = await asyncio.wait_for(self.execution(queue_request, func_info, timeout, offload=True), timeout)
+        except asyncio.TimeoutError:
+            log.warning(f"Message {message.id} of {func_info.project}.{func_info.function_name} exceeded the time limit of {timeout} seconds")
+            return False
+        return getattr(result, "status_code", 200) < 400
@@ -0,0 +1,119 @@
+"""Record the HTTP, event and queue invocations served by the app to a JSONL file (RECORD_TRAFFIC).
+
+Each line has the request (method, path, query, headers, body), the time it arrived, its
+duration and the response (status, headers, body hash and body). `benchmarks/replay.py`
+sends the recorded traffic again.
+"""
+import os
+import json
+import time
+import base64
+import hashlib
+import threading
+import queue
+from typing import Optional
+from logger import get_logger
+
+log = get_logger("recorder")
+
+RECORDED_PREFIXES = ("/api/", "/event/", "/queue/")
+
+def encode_body(body: bytes) -> dict:
+    """Text bodies are kept as they are, binary ones as base64."""
+    try:
+        return {"body": body.decode("utf-8"), "body_encoding": "utf-8"}
+    except UnicodeDecodeError:
+        return {"body": base64.b64encode(body).decode("ascii"), "body_encoding": "base64"}
+
+def decode_body(record: dict, field: str = "body") -> bytes:
+    value = record.get(field) or ""
+    if record.get(f"{field}_encoding") == "base64":
+        return base64.b64decode(value)
+    return value.encode("utf-8")
+
+class TrafficWriter:
+    """Append records to the file from a background thread, so the event loop never waits for the disk."""
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self.queue = queue.SimpleQueue()
+        threading.Thread(target=self._write_loop, name="localrunner-recorder", daemon=True).start()
+
+    def write(self, record: dict):
+        self.queue.put(record)
+
+    def _write_loop(self):
+        with open(self.path, "a", encoding="utf-8") as file:
+            while True:
+                record = self.queue.get()
+                file.write(json.dumps(record) + "\n")
+                if self.queue.empty():
+                    file.flush()
+
+class TrafficRecorder:
+    """ASGI middleware that copies the request and response of /api, /event and /queue calls into the recording."""
+
+    def __init__(self, app, path: Optional[str] = None, max_body: Optional[int] = None):
+        self.app = app
+        path = path if path is not None else os.getenv("RECORD_TRAFFIC", "")
+        self.writer = TrafficWriter(path) if path else None
+        self.max_body = max_body if max_body is not None else int(os.getenv("RECORD_TRAFFIC_MAX_BODY", str(1024 * 1024)))
+        if self.writer:
+            log.info(f"Recording traffic to {self.writer.path}")
+
+    async def __call__(self, scope, receive, send):
+        if self.writer is None or scope["type"] != "http" or not scope["path"].startswith(RECORDED_PREFIXES):
+            return await self.app(scope, receive, send)
+
+        started_at = time.time()
+        start = time.perf_counter()
+        request_body = bytearray()
+        request_size = 0
+        response = {"status": None, "headers": [], "size": 0}
+        response_body = bytearray()
+        response_hash = hashlib.sha256()
+
+        async def recording_receive():
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                request_size += len(chunk)
+                if len(request_body) + len(chunk) <= self.max_body:
+                    request_body.extend(chunk)
+            return message
+
+        async def recording_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [[name.decode("latin-1"), value.decode("latin-1")] for name, value in message.get("headers", [])]
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                response["size"] += len(chunk)
+                response_hash.update(chunk)
+                if len(response_body) + len(chunk) <= self.max_body:
+                    response_body.extend(chunk)
+            await send(message)
+
+        try:
+            await self.app(scope, recording_receive, recording_send)
+        finally:
+            record = {
+                "started_at": started_at,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "headers": [[name.decode("latin-1"), value.decode("latin-1")] for name, value in scope.get("headers", [])],
+                **encode_body(bytes(request_body)),
+                "body_truncated": request_size > len(request_body),
+                "response": {
+                    "status": response["status"],
+                    "headers": response["headers"],
+                    "size": response["size"],
+                    "sha256": response_hash.hexdigest(),
+                    **encode_body(bytes(response_body)),
+                    "body_truncated": response["size"] > len(response_body),
+                }
+            }
+            self.writer.write(record)
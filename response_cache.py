@@ -0,0 +1,231 @@
+"""Opt-in cache of the responses of idempotent HTTP functions.
+
+Enabled per function with the `localRunner.cache` field of function.json:
+
+    "localRunner": {"cache": {"ttl": 30, "varyHeaders": ["Accept-Language"]}}
+
+or for functions listed in RESPONSE_CACHE. Entries are dropped when the file watcher reloads a
+module the function depends on or when its function.json changes.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from fastapi import Request
+from fastapi.responses import Response
+from function_info import FunctionInfo
+import metrics
+
+CACHE_HEADER = "x-localrunner-cache"
+CACHEABLE_METHODS = ("GET", "HEAD")
+CACHEABLE_STATUS = (200,)
+BASE_KEY_SIZE = 6  # Itens de base_key; o restante da chave vem do Vary da resposta
+
+CACHE_LOOKUPS = metrics.Counter(
+    "localrunner_response_cache_total",
+    "Response cache lookups by result (hit, miss, bypass, not_modified).",
+    ("function", "result")
+)
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """Cache-Control directives in lower case: {"max-age": "60", "no-store": None}"""
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """Weak comparison of If-None-Match against an ETag (W/"x" matches "x")."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.strip().removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+class CacheConfig:
+    def __init__(self, ttl: float, vary_headers: Iterable[str] = (), methods: Iterable[str] = CACHEABLE_METHODS):
+        self.ttl = ttl
+        self.vary_headers = tuple(sorted(header.lower() for header in vary_headers))
+        self.methods = tuple(method.upper() for method in methods if method.upper() in CACHEABLE_METHODS)
+
+class CacheEntry:
+    def __init__(self, function_key: Tuple[str, str], main_module: str, status_code: int, headers: List[Tuple[bytes, bytes]], body: bytes, expires_at: float):
+        self.function_key = function_key
+        self.main_module = main_module
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self.expires_at = expires_at
+        self.etag = next((value.decode("latin-1") for name, value in headers if name == b"etag"), None)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(name) + len(value) for name, value in self.headers)
+
+class ResponseCache:
+    """LRU of function responses limited by entries (RESPONSE_CACHE_MAX_ENTRIES) and bytes (RESPONSE_CACHE_MAX_MB)."""
+
+    _entries: "OrderedDict[tuple, CacheEntry]" = OrderedDict()  # Do menos para o mais recente
+    _vary: Dict[tuple, Tuple[str, ...]] = {}  # Cabeçalhos do Vary da resposta, por chave base
+    _size = 0
+    _lock = threading.Lock()  # O file watcher invalida a partir da sua própria thread
+
+    @staticmethod
+    def max_entries() -> int:
+        return int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+
+    @staticmethod
+    def max_bytes() -> int:
+        return int(float(os.getenv("RESPONSE_CACHE_MAX_MB", "64")) * 1024 * 1024)
+
+    @staticmethod
+    def config_for(func_info: FunctionInfo) -> Optional[CacheConfig]:
+        """Cache settings of the function, or None when its responses are not cached."""
+        default_ttl = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+        option = func_info.local_runner.get("cache")
+        if option is None:
+            enabled = {name.strip() for name in os.getenv("RESPONSE_CACHE", "").split(",") if name.strip()}
+            if "*" not in enabled and f"{func_info.project}.{func_info.function_name}" not in enabled:
+                return None
+            option = True
+        if option is False:
+            return None
+        if option is True:
+            return CacheConfig(default_ttl)
+        return CacheConfig(
+            float(option.get("ttl", default_ttl)),
+            option.get("varyHeaders", ()),
+            option.get("methods", CACHEABLE_METHODS)
+        )
+
+    @classmethod
+    def base_key(cls, func_info: FunctionInfo, config: CacheConfig, request: Request, route_params: dict) -> tuple:
+        return (
+            func_info.project,
+            func_info.function_name,
+            request.method,
+            tuple(sorted((key, str(value)) for key, value in route_params.items())),
+            tuple(sorted(request.query_params.multi_items())),
+            tuple(request.headers.get(header, "") for header in config.vary_headers)
+        )
+
+    @classmethod
+    def key_for(cls, base_key: tuple, request: Request) -> tuple:
+        """Base key plus the values of the headers listed in the Vary of the cached response."""
+        vary = cls._vary.get(base_key, ())
+        return base_key + tuple(request.headers.get(header, "") for header in vary)
+
+    @classmethod
+    def lookup(cls, key: tuple) -> Optional[CacheEntry]:
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                cls._remove(key)
+                return None
+            cls._entries.move_to_end(key)
+            return entry
+
+    @classmethod
+    def store(cls, base_key: tuple, request: Request, config: CacheConfig, func_info: FunctionInfo, response: Response) -> bool:
+        """Keep a copy of the response unless its status or Cache-Control forbid it."""
+        if response.status_code not in CACHEABLE_STATUS or not isinstance(getattr(response, "body", None), bytes):
+            return False
+        directives = parse_cache_control(response.headers.get("cache-control"))
+        if "no-store" in directives or "no-cache" in directives or "private" in directives:
+            return False
+        vary = tuple(sorted(header.strip().lower() for header in response.headers.get("vary", "").split(",") if header.strip()))
+        if "*" in vary:
+            return False
+
+        ttl = config.ttl
+        for directive in ("s-maxage", "max-age"):
+            if (directives.get(directive) or "").isdigit():
+                ttl = int(directives[directive])
+                break
+        if ttl <= 0:
+            return False
+
+        headers = [(name, value) for name, value in response.raw_headers if name != b"content-length"]
+        entry = CacheEntry(
+            (func_info.project, func_info.function_name), func_info.main_module,
+            response.status_code, headers, response.body, time.monotonic() + ttl
+        )
+        if entry.size > cls.max_bytes():
+            return False
+
+        with cls._lock:
+            cls._vary[base_key] = vary
+            key = base_key + tuple(request.headers.get(header, "") for header in vary)
+            if key in cls._entries:
+                cls._remove(key)
+            cls._entries[key] = entry
+            cls._size += entry.size
+            while cls._entries and (len(cls._entries) > cls.max_entries() or cls._size > cls.max_bytes()):
+                cls._remove(next(iter(cls._entries)))
+            if len(cls._vary) > len(cls._entries) * 2:
+                cls._prune_vary()
+        return True
+
+    @classmethod
+    def _remove(cls, key: tuple):
+        entry = cls._entries.pop(key)
+        cls._size -= entry.size
+
+    @classmethod
+    def _remove_where(cls, predicate) -> int:
+        with cls._lock:
+            keys = [key for key, entry in cls._entries.items() if predicate(entry)]
+            for key in keys:
+                cls._remove(key)
+            cls._prune_vary()
+        return len(keys)
+
+    @classmethod
+    def _prune_vary(cls):
+        """Forget the Vary of base keys without entries."""
+        live = {key[:BASE_KEY_SIZE] for key in cls._entries}
+        cls._vary = {base_key: vary for base_key, vary in cls._vary.items() if base_key in live}
+
+    @classmethod
+    def invalidate_modules(cls, module_names: Iterable[str]) -> int:
+        """Drop the entries of functions whose main module was reloaded (directly or as a dependent)."""
+        module_names = set(module_names)
+        return cls._remove_where(lambda entry: entry.main_module in module_names)
+
+    @classmethod
+    def invalidate_functions(cls, functions: Iterable[Tuple[str, str]]) -> int:
+        functions = set(functions)
+        return cls._remove_where(lambda entry: entry.function_key in functions)
+
+    @classmethod
+    def clear(cls) -> int:
+        return cls._remove_where(lambda entry: True)
+
+    @classmethod
+    def stats(cls) -> dict:
+        return {"entries": len(cls._entries), "bytes": cls._size}
+
+def not_modified(headers: List[Tuple[bytes, bytes]]) -> Response:
+    response = Response(status_code=304)
+    response.raw_headers = [(name, value) for name, value in headers if name in (b"etag", b"cache-control", b"vary")]
+    return response
+
+def cached_response(entry: CacheEntry, request: Request) -> Response:
+    """Response rebuilt from the entry; 304 when If-None-Match matches its ETag."""
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return not_modified(entry.headers)
+    response = Response(content=entry.body, status_code=entry.status_code)
+    response.raw_headers = entry.headers + [(b"content-length", str(len(entry.body)).encode())]
+    return response
+
+def conditional_response(response: Response, request: Request) -> Response:
+    """304 for a fresh response whose ETag matches If-None-Match."""
+    if response.status_code == 200 and etag_matches(request.headers.get("if-none-match"), response.headers.get("etag")):
+        return not_modified(response.raw_headers)
+    return response
@@ -0,0 +1,306 @@
+import re
+import os
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+def _is_float(value: str) -> bool:
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+def _is_guid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+        return True
+    except ValueError:
+        return False
+
+def _is_datetime(value: str) -> bool:
+    try:
+        datetime.fromisoformat(value)
+        return True
+    except ValueError:
+        return False
+
+# Azure Functions (ASP.NET) route constraints
+CONSTRAINTS: Dict[str, Callable[[str], bool]] = {
+    "int": lambda value: re.fullmatch(r"-?\d+", value) is not None,
+    "long": lambda value: re.fullmatch(r"-?\d+", value) is not None,
+    "bool": lambda value: value.lower() in ("true", "false"),
+    "alpha": lambda value: value.isascii() and value.isalpha(),
+    "guid": _is_guid,
+    "decimal": _is_float,
+    "double": _is_float,
+    "float": _is_float,
+    "datetime": _is_datetime,
+}
+
+def _split_arguments(arguments: str) -> List[str]:
+    return [argument.strip() for argument in arguments.split(",")]
+
+def parse_constraint(spec: str) -> Callable[[str], bool]:
+    """Build the validator of a single constraint such as int, length(3) or regex(^a.*$)."""
+    name, _, arguments = spec.partition("(")
+    name = name.strip().lower()
+    arguments = arguments[:-1] if arguments.endswith(")") else arguments
+
+    if name in CONSTRAINTS:
+        return CONSTRAINTS[name]
+    if name == "regex":
+        pattern = re.compile(arguments.replace("{{", "{").replace("}}", "}"))
+        return lambda value: pattern.search(value) is not None
+    if name in ("min", "max", "range"):
+        limits = [int(argument) for argument in _split_arguments(arguments)]
+        low = limits[0] if name in ("min", "range") else None
+        high = limits[-1] if name in ("max", "range") else None
+        return lambda value: (
+            CONSTRAINTS["long"](value)
+            and (low is None or int(value) >= low)
+            and (high is None or int(value) <= high)
+        )
+    if name in ("length", "minlength", "maxlength"):
+        limits = [int(argument) for argument in _split_arguments(arguments)]
+        if name == "minlength":
+            return lambda value: len(value) >= limits[0]
+        if name == "maxlength":
+            return lambda value: len(value) <= limits[0]
+        return lambda value: limits[0] <= len(value) <= limits[-1]
+
+    # Unknown constraints are accepted as the Azure host would fail at startup instead
+    return lambda value: True
+
+def _split_top_level(text: str, separator: str) -> List[str]:
+    """Split on a separator that is not inside parentheses."""
+    parts, depth, current = [], 0, ""
+    for char in text:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == separator and depth == 0:
+            parts.append(current)
+            current = ""
+        else:
+            current += char
+    parts.append(current)
+    return parts
+
+class RouteParameter:
+    def __init__(self, token: str):
+        self.catch_all = token.startswith("*")
+        token = token.lstrip("*")
+        self.optional = token.endswith("?")
+        token = token.rstrip("?")
+
+        token, _, default = token.partition("=")
+        self.default = default or None
+        self.optional = self.optional or self.default is not None
+
+        name, *constraints = _split_top_level(token, ":")
+        self.name = name.strip()
+        self.constraint_specs = [constraint for constraint in constraints if constraint]
+        self.validators = [parse_constraint(constraint) for constraint in self.constraint_specs]
+
+    def accepts(self, value: str) -> bool:
+        return all(validator(value) for validator in self.validators)
+
+class RouteSegment:
+    """One path segment of a template: a literal, a parameter or a mix such as file.{ext}."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.parts = self._tokenize(text)
+        self.parameters = [part for part in self.parts if isinstance(part, RouteParameter)]
+        self.is_literal = not self.parameters
+        self.is_parameter = len(self.parts) == 1 and not self.is_literal
+        self.pattern = None
+        if not self.is_literal and not self.is_parameter:
+            self.pattern = re.compile("".join(
+                f"(?P<p{index}>.+?)" if isinstance(part, RouteParameter) else re.escape(part)
+                for index, part in enumerate(self.parts)
+            ), re.IGNORECASE)
+
+    @staticmethod
+    def _tokenize(text: str) -> list:
+        parts, index = [], 0
+        while index < len(text):
+            start = text.find("{", index)
+            if start < 0:
+                parts.append(text[index:])
+                break
+            if start > index:
+                parts.append(text[index:start])
+            depth, end = 0, start
+            while end < len(text):
+                if text[end] == "{":
+                    depth += 1
+                elif text[end] == "}":
+                    depth -= 1
+                    if depth == 0:
+                        break
+                end += 1
+            parts.append(RouteParameter(text[start + 1:end]))
+            index = end + 1
+        return parts
+
+    @property
+    def optional(self) -> bool:
+        return self.is_parameter and self.parameters[0].optional
+
+    @property
+    def catch_all(self) -> bool:
+        return self.is_parameter and self.parameters[0].catch_all
+
+    @property
+    def specificity(self) -> int:
+        """Mixed segments are tried before constrained parameters, and those before plain ones."""
+        if self.pattern:
+            return 0
+        return 1 if self.parameters[0].validators else 2
+
+    def match(self, value: str) -> Optional[Dict[str, str]]:
+        if self.is_parameter:
+            parameter = self.parameters[0]
+            return {parameter.name: value} if parameter.accepts(value) else None
+
+        found = self.pattern.fullmatch(value)
+        if not found:
+            return None
+        values = {}
+        for index, part in enumerate(self.parts):
+            if isinstance(part, RouteParameter):
+                captured = found.group(f"p{index}")
+                if not part.accepts(captured):
+                    return None
+                values[part.name] = captured
+        return values
+
+class RouteNode:
+    def __init__(self):
+        self.literals: Dict[str, "RouteNode"] = {}
+        self.parameters: List[Tuple[RouteSegment, "RouteNode"]] = []
+        self.catch_all: Optional[Tuple[RouteParameter, object]] = None
+        self.target = None
+        self.defaults: Dict[str, str] = {}
+
+class RouteTrie:
+    """Trie of compiled route templates; matching walks one node per path segment."""
+
+    def __init__(self):
+        self.root = RouteNode()
+
+    @staticmethod
+    def split(path: str) -> List[str]:
+        return [part for part in path.split("/") if part]
+
+    def insert(self, template: str, target):
+        node = self.root
+        segments = [RouteSegment(text) for text in self.split(template)]
+        for position, segment in enumerate(segments):
+            if segment.catch_all:
+                node.catch_all = node.catch_all or (segment.parameters[0], target)
+                return
+            if segment.optional and node.target is None:
+                # Everything after an optional segment is optional as well
+                node.target = target
+                node.defaults = {
+                    later.parameters[0].name: later.parameters[0].default
+                    for later in segments[position:]
+                    if later.is_parameter and later.parameters[0].default is not None
+                }
+
+            if segment.is_literal:
+                node = node.literals.setdefault(segment.text.lower(), RouteNode())
+                continue
+
+            child = next((child for existing, child in node.parameters if existing.text == segment.text), None)
+            if child is None:
+                child = RouteNode()
+                node.parameters.append((segment, child))
+                node.parameters.sort(key=lambda item: item[0].specificity)
+            node = child
+
+        if node.target is None:
+            node.target = target
+
+    def match(self, path: str):
+        """Return (target, route_params) for the path, or None."""
+        return self._match(self.root, self.split(path), 0, {})
+
+    def _match(self, node: RouteNode, parts: List[str], index: int, values: Dict[str, str]):
+        if index == len(parts):
+            if node.target is not None:
+                return node.target, {**node.defaults, **values}
+            if node.catch_all:
+                parameter, target = node.catch_all
+                return target, {**values, parameter.name: ""}
+            return None
+
+        part = parts[index]
+        child = node.literals.get(part.lower())
+        if child:
+            found = self._match(child, parts, index + 1, values)
+            if found:
+                return found
+
+        for segment, child in node.parameters:
+            captured = segment.match(part)
+            if captured is not None:
+                found = self._match(child, parts, index + 1, {**values, **captured})
+                if found:
+                    return found
+
+        if node.catch_all:
+            parameter, target = node.catch_all
+            if parameter.accepts("/".join(parts[index:])):
+                return target, {**values, parameter.name: "/".join(parts[index:])}
+        return None
+
+class RouteTable:
+    """Routes of every HTTP function compiled once, rebuilt when the function registry changes."""
+
+    _function_routes: Dict[Tuple[str, str], RouteTrie] = {}
+    _project_routes: Dict[Optional[str], RouteTrie] = {}
+
+    @staticmethod
+    def azure_routes_enabled() -> bool:
+        return os.getenv("AZURE_ROUTES", "false").lower() == "true"
+
+    @classmethod
+    def rebuild(cls, functions):
+        function_routes = {}
+        project_routes = {None: RouteTrie()}
+        for func_info in functions:
+            if not func_info.is_http():
+                continue
+
+            if func_info.route:
+                trie = RouteTrie()
+                trie.insert(func_info.route, func_info)
+                function_routes[(func_info.project, func_info.function_name)] = trie
+
+            # Without a route the Azure host serves the function at /api/<FunctionName>
+            template = func_info.route or func_info.function_name
+            project_routes.setdefault(func_info.project, RouteTrie()).insert(template, func_info)
+            project_routes[None].insert(template, func_info)
+
+        cls._function_routes = function_routes
+        cls._project_routes = project_routes
+
+    @classmethod
+    def match_function(cls, project: str, function_name: str, path: str) -> Optional[Dict[str, str]]:
+        """Route params of a known function, or None when the path does not match its route."""
+        trie = cls._function_routes.get((project, function_name))
+        if trie is None:
+            return {}
+        found = trie.match(path)
+        return found[1] if found else None
+
+    @classmethod
+    def resolve(cls, path: str, project: Optional[str] = None):
+        """Find the function serving an Azure-style path (without the Project.Function prefix)."""
+        trie = cls._project_routes.get(project)
+        return trie.match(path) if trie else None
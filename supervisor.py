@@ -0,0 +1,179 @@
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import tempfile
+from typing import Dict, Optional
+import logger
+from logger import get_logger
+
+log = get_logger("supervisor")
+
+LOCAL_RUNNER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class ProjectWorker:
+    """One project-mode LocalRunner process behind the gateway, listening on a Unix socket (or a local port)."""
+
+    def __init__(self, project: str, env: Dict[str, str], address):
+        self.project = project
+        self.env = env
+        self.address = address  # Caminho do socket Unix ou (host, port)
+        self.process = None
+        self.restarts = 0
+        self.started_at = None
+        self.ready = asyncio.Event()  # Limpo enquanto o processo (re)inicia
+
+    @property
+    def uses_unix_socket(self) -> bool:
+        return isinstance(self.address, str)
+
+    async def open_connection(self):
+        if self.uses_unix_socket:
+            return await asyncio.open_unix_connection(self.address)
+        return await asyncio.open_connection(*self.address)
+
+    async def start(self):
+        self.ready.clear()
+        env = {**os.environ, **self.env, "PROJECT": self.project}
+        env.pop("SUPERVISOR_CONFIG", None)
+        env.pop("RECORD_TRAFFIC", None)  # O gateway grava o tráfego de todos os projetos
+        if self.uses_unix_socket:
+            env["UDS"] = self.address
+            if os.path.exists(self.address):
+                os.remove(self.address)
+        else:
+            env.pop("UDS", None)
+            env["WORKER_PORT"] = str(self.address[1])
+
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.join(LOCAL_RUNNER_DIR, "main.py"),
+            env=env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT
+        )
+        self.started_at = time.time()
+        asyncio.create_task(self.forward_logs(self.process))
+
+    async def forward_logs(self, process):
+        """Log the output of the worker with the project as prefix (JSON lines are passed through)."""
+        while True:
+            line = await process.stdout.readline()
+            if not line:
+                break
+            text = line.decode(errors="replace").rstrip()
+            if logger.is_json() and text.startswith("{"):
+                log.info(text, extra={"raw": True})
+            else:
+                log.info(f"[{self.project}] {text}")
+
+    async def wait_ready(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.returncode is not None:
+                return False
+            try:
+                _, writer = await self.open_connection()
+                writer.close()
+                self.ready.set()
+                return True
+            except OSError:
+                await asyncio.sleep(0.1)
+        return False
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    def describe(self) -> dict:
+        return {
+            "pid": self.process.pid if self.process else None,
+            "alive": self.is_alive(),
+            "address": self.address if self.uses_unix_socket else f"{self.address[0]}:{self.address[1]}",
+            "restarts": self.restarts,
+            "started_at": self.started_at
+        }
+
+class Supervisor:
+    """Start one worker per project from SUPERVISOR_CONFIG and restart the ones that exit."""
+
+    def __init__(self, config: dict, port: int):
+        self.port = port
+        self.stopping = False
+        self.workers: Dict[str, ProjectWorker] = {}
+        self.monitors = []
+
+        projects = config.get("projects", {})
+        if isinstance(projects, list):
+            projects = {project: {} for project in projects}
+        shared_env = {key: str(value) for key, value in config.get("env", {}).items()}
+        use_unix_sockets = hasattr(socket, "AF_UNIX") and os.name != "nt"
+
+        for index, (project, options) in enumerate(projects.items()):
+            env = {**shared_env, **{key: str(value) for key, value in (options or {}).get("env", {}).items()}}
+            # Os workers enxergam a porta do gateway, para que o local_event_bus reconheça os próprios endpoints
+            env["PORT"] = str(port)
+            if use_unix_sockets:
+                address = os.path.join(tempfile.gettempdir(), f"localrunner-{port}-{project}.sock")
+            else:
+                address = ("127.0.0.1", int((options or {}).get("port", port + index + 1)))
+            self.workers[project] = ProjectWorker(project, env, address)
+
+    @staticmethod
+    def load_config(value: Optional[str] = None) -> dict:
+        """SUPERVISOR_CONFIG is either inline JSON or the path of a JSON file."""
+        value = value if value is not None else os.getenv("SUPERVISOR_CONFIG", "")
+        if value.strip().startswith("{"):
+            return json.loads(value)
+        with open(value) as file:
+            return json.load(file)
+
+    def get(self, project: str) -> Optional[ProjectWorker]:
+        return self.workers.get(project)
+
+    async def start(self, timeout: float):
+        start = time.perf_counter()
+        for worker in self.workers.values():
+            await worker.start()
+        ready = await asyncio.gather(*(worker.wait_ready(timeout) for worker in self.workers.values()))
+        for worker, is_ready in zip(self.workers.values(), ready):
+            status = "ready" if is_ready else "NOT ready"
+            log.info(f"Worker {worker.project} (pid {worker.process.pid}) {status}")
+        log.info(f"Supervisor started {sum(ready)} of {len(ready)} workers in {(time.perf_counter() - start) * 1000:.0f}ms")
+        self.monitors = [asyncio.create_task(self.monitor(worker)) for worker in self.workers.values()]
+
+    async def monitor(self, worker: ProjectWorker):
+        """Restart the worker when it exits, waiting longer after consecutive crashes."""
+        backoff = 1
+        while not self.stopping:
+            code = await worker.process.wait()
+            if self.stopping:
+                return
+            worker.ready.clear()
+            uptime = time.time() - worker.started_at
+            backoff = 1 if uptime > 30 else min(backoff * 2, 30)
+            log.warning(f"Worker {worker.project} exited with code {code}, restarting in {backoff}s")
+            await asyncio.sleep(backoff)
+            worker.restarts += 1
+            await worker.start()
+            await worker.wait_ready(60)
+
+    async def stop(self, timeout: float = 10):
+        self.stopping = True
+        for task in self.monitors:
+            task.cancel()
+        for worker in self.workers.values():
+            if worker.is_alive():
+                worker.process.terminate()
+        for worker in self.workers.values():
+            if worker.process is None:
+                continue
+            try:
+                await asyncio.wait_for(worker.process.wait(), timeout)
+            except asyncio.TimeoutError:
+                worker.process.kill()
+            if worker.uses_unix_socket and os.path.exists(worker.address):
+                os.remove(worker.address)
+
+    def describe(self) -> dict:
+        return {project: worker.describe() for project, worker in self.workers.items()}
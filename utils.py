@@ -1,9 +1,14 @@
 import os
 import json
-from typing import Dict, Any, Optional, List
+import mimetypes
+from collections.abc import AsyncIterator, Iterator
+from typing import Dict, Any, Optional
 from fastapi import Response
+from fastapi.responses import StreamingResponse
 import azure.functions as func
 
+STREAM_CHUNK_SIZE = 64 * 1024
+
 def parse_path_to_function_name(path: str) -> tuple:
     parts = path.strip('/').split('/')
     if not parts or len(parts) < 1:
@@ -33,23 +38,6 @@ def load_function_json(function_path: str) -> Optional[Dict[str, Any]]:
         except json.JSONDecodeError:
             return None
 
-def extract_route_params(route_template: str, path_parts: List[str]) -> Dict[str, str]:
-    if not route_template:
-        return {}
-        
-    template_parts = route_template.split('/')
-    
-    if len(template_parts) > len(path_parts):
-        return {}
-    
-    params = {}
-    for i, template in enumerate(template_parts):
-        if i < len(path_parts) and template.startswith('{') and template.endswith('}'):
-            param_name = template[1:-1]
-            params[param_name] = path_parts[i]
-    
-    return params
-
 def azure_response_to_fastapi(azure_response: func.HttpResponse) -> Response:
     headers = {}
     for key, value in azure_response.headers.items():
@@ -61,3 +49,33 @@ def azure_response_to_fastapi(azure_response: func.HttpResponse) -> Response:
         headers=headers,
         media_type=azure_response.mimetype
     )
+
+
+def is_streamable(result) -> bool:
+    """File-like objects and iterators returned by main are streamed instead of buffered."""
+    return callable(getattr(result, "read", None)) or isinstance(result, (Iterator, AsyncIterator))
+
+def iterate_chunks(result):
+    """Bytes chunks of a file-like object or iterator, closing it at the end."""
+    try:
+        if callable(getattr(result, "read", None)):
+            while chunk := result.read(STREAM_CHUNK_SIZE):
+                yield chunk.encode() if isinstance(chunk, str) else chunk
+        else:
+            for chunk in result:
+                yield chunk.encode() if isinstance(chunk, str) else chunk
+    finally:
+        close = getattr(result, "close", None)
+        if callable(close):
+            close()
+
+async def aiterate_chunks(result):
+    async for chunk in result:
+        yield chunk.encode() if isinstance(chunk, str) else chunk
+
+def streaming_response(result) -> StreamingResponse:
+    """StreamingResponse for a file-like or iterable result; sync sources are read on the thread pool."""
+    name = getattr(result, "name", None)
+    media_type = (mimetypes.guess_type(name)[0] if isinstance(name, str) else None) or "application/octet-stream"
+    content = aiterate_chunks(result) if isinstance(result, AsyncIterator) else iterate_chunks(result)
+    return StreamingResponse(content, media_type=media_type)
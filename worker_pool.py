@@ -0,0 +1,270 @@
+import os
+import time
+import asyncio
+import traceback
+import multiprocessing
+import azure.functions as func
+from utils import is_streamable, streaming_response
+import logger
+from logger import get_logger
+
+log = get_logger("worker_pool")
+
+def is_function_project(root_dir: str, project: str) -> bool:
+    """Whether a top-level directory of the workspace is a project (holds functions) instead of shared code."""
+    from function_registry import FunctionRegistry
+    if any(func_info.project == project for func_info in FunctionRegistry.functions()):
+        return True
+    try:
+        return any(
+            entry.is_dir() and os.path.exists(os.path.join(entry.path, "function.json"))
+            for entry in os.scandir(os.path.join(root_dir, project))
+        )
+    except OSError:
+        return False
+
+class WorkerCrashed(Exception):
+    pass
+
+def build_request(kind: str, payload: dict):
+    """Rebuild the Azure request object inside the worker process."""
+    if kind == "event":
+        from LocalRunner.azure_request_type.event_request import EventRequest
+        return EventRequest(payload)
+    if kind == "queue":
+        from LocalRunner.azure_request_type.queue_request import build_queue_request
+        return build_queue_request(payload)
+    body = payload["body"]
+    if payload.get("body_path"):
+        with open(payload["body_path"], "rb") as file:
+            body = file.read()
+    return func.HttpRequest(
+        payload["method"],
+        payload["url"],
+        headers=payload["headers"],
+        params=payload["params"],
+        route_params=payload["route_params"],
+        body=body
+    )
+
+def dump_result(result):
+    """Convert the function result into something that can cross the pipe."""
+    if is_streamable(result):
+        # Streams cannot cross the pipe, so they are read to the end inside the worker
+        response = streaming_response(result)
+        chunks = asyncio.run(_collect(response.body_iterator))
+        return ("http", {"body": b"".join(chunks), "status_code": 200, "headers": {}, "mimetype": response.media_type, "charset": None})
+    if isinstance(result, func.HttpResponse):
+        return ("http", {
+            "body": result.get_body(),
+            "status_code": result.status_code,
+            "headers": dict(result.headers),
+            "mimetype": result.mimetype,
+            "charset": result.charset
+        })
+    return ("raw", result)
+
+async def _collect(iterator):
+    return [chunk async for chunk in iterator]
+
+def load_result(dumped):
+    kind, value = dumped
+    if kind == "http":
+        return func.HttpResponse(**value)
+    return value
+
+def worker_main(conn, preload=()):
+    """Loop of a worker process: receive an invocation, run it and send back the result."""
+    from context_execution_singleton import ContextExecutionSingleton as executor
+    from LocalRunner.azure_request_type.invocation_context import InvocationContext
+
+    logger.setup()
+    # Modules the previous generation had loaded, imported before the first request
+    for project, main_module in preload:
+        executor.load(project, main_module)
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+
+        project, main_module, kind, payload, context = message
+        context = InvocationContext(**context) if context else None
+        try:
+            if context is None:
+                result = executor.load(project, main_module).execute(build_request(kind, payload))
+            else:
+                with logger.invocation(context.invocation_id, context.log_name):
+                    result = executor.load(project, main_module).execute(build_request(kind, payload), context)
+            conn.send(("ok", dump_result(result)))
+        except Exception as e:
+            conn.send(("error", str(e), traceback.format_exc()))
+
+class WorkerProcess:
+    def __init__(self, context, generation: int, preload=()):
+        self.generation = generation
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=worker_main, args=(child_conn, list(preload)), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def call(self, message, timeout=None):
+        """Send one invocation and block until the worker answers (runs on a helper thread)."""
+        self.conn.send(message)
+        if not self.conn.poll(timeout):
+            raise asyncio.TimeoutError(f"Worker process {self.process.pid} exceeded the timeout of {timeout} seconds")
+        try:
+            return self.conn.recv()
+        except EOFError:
+            raise WorkerCrashed(f"Worker process {self.process.pid} exited with code {self.process.exitcode}")
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self):
+        """Ask the worker to finish and close the pipe."""
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.conn.close()
+
+class WorkerPool:
+    _pools = {}  # Pools de processos, identificados por PROJECT ou PROJECT.FUNCTION
+    _context = None
+
+    def __init__(self, key: str, size: int):
+        self.key = key
+        self.size = size
+        self.generation = 0  # Incrementado pelo file watcher para reciclar os processos
+        self.loaded = set()  # (project, main_module) executados, pré-carregados nos novos workers
+        self._idle = None
+        self._loop = None
+
+    @staticmethod
+    def is_zygote_mode() -> bool:
+        import zygote
+        return os.getenv("EXECUTION_MODE", "inline").lower() == "zygote" and zygote.is_supported()
+
+    @classmethod
+    def context(cls):
+        """spawn context, or the forkserver of zygote.py in EXECUTION_MODE=zygote."""
+        if cls._context is None:
+            if cls.is_zygote_mode():
+                import zygote
+                from function_registry import FunctionRegistry
+                root_dir = FunctionRegistry.root_dir()
+                projects = {func_info.project for func_info in FunctionRegistry.functions()}
+                directories = [os.path.join(root_dir, project) for project in sorted(projects)]
+                directories.append(os.path.join(root_dir, "SharedLibraries"))
+                cls._context = zygote.context(root_dir, directories)
+            else:
+                cls._context = multiprocessing.get_context("spawn")
+        return cls._context
+
+    @staticmethod
+    def scope_key(project: str, function_name: str) -> str:
+        if os.getenv("WORKER_SCOPE", "project").lower() == "function":
+            return f"{project}.{function_name}"
+        return project
+
+    @classmethod
+    def for_function(cls, project: str, function_name: str) -> "WorkerPool":
+        key = cls.scope_key(project, function_name)
+        if key not in cls._pools:
+            cls._pools[key] = cls(key, int(os.getenv("WORKER_PROCESSES", "2")))
+        return cls._pools[key]
+
+    def spawn(self) -> WorkerProcess:
+        return WorkerProcess(self.context(), self.generation, self.loaded)
+
+    def ensure_started(self):
+        if self._idle is None:
+            self._loop = asyncio.get_running_loop()
+            self._idle = asyncio.Queue()
+            for _ in range(self.size):
+                self._idle.put_nowait(self.spawn())
+            log.info(f"Started {self.size} worker processes for {self.key}")
+
+    async def acquire(self) -> WorkerProcess:
+        self.ensure_started()
+        worker = await self._idle.get()
+        if worker.generation != self.generation or not worker.is_alive():
+            worker.stop()
+            worker = self.spawn()
+        return worker
+
+    async def execute(self, project: str, main_module: str, kind: str, payload: dict, timeout=None, context=None):
+        """Run one invocation on an idle worker, killing it if it exceeds the timeout."""
+        timeout = timeout or float(os.getenv("WORKER_TIMEOUT", "0")) or None
+        self.loaded.add((project, main_module))
+        worker = await self.acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            response = await loop.run_in_executor(None, worker.call, (project, main_module, kind, payload, context), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError, WorkerCrashed):
+            # The worker may still be running the function: kill it so the timeout is a hard one
+            worker.kill()
+            self._idle.put_nowait(self.spawn())
+            raise
+        self._idle.put_nowait(worker)
+
+        if response[0] == "error":
+            raise Exception(f"{response[1]}\n{response[2]}")
+        return load_result(response[1])
+
+    def recycle(self):
+        """Retire every worker; new ones are spawned with fresh modules on the next request.
+
+        In zygote mode forking is cheap, so the idle workers are replaced right away."""
+        self.generation += 1
+        if self._loop is not None and self.is_zygote_mode():
+            self._loop.call_soon_threadsafe(self._replace_idle)
+
+    def _replace_idle(self):
+        start = time.perf_counter()
+        workers = []
+        while not self._idle.empty():
+            workers.append(self._idle.get_nowait())
+        replaced = 0
+        for worker in workers:
+            if worker.generation != self.generation or not worker.is_alive():
+                worker.stop()
+                worker = self.spawn()
+                replaced += 1
+            self._idle.put_nowait(worker)
+        if replaced:
+            log.info(f"Forked {replaced} clean workers for {self.key} in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    @classmethod
+    def recycle_for_paths(cls, file_paths, root_dir: str):
+        """Recycle the pools of the projects that own the files, or all pools for shared code.
+
+        A change in a project that has no pool yet recycles nothing: its workers start with the new code.
+        """
+        recycled = {}
+        if cls.is_zygote_mode():
+            import zygote
+            if zygote.workspace_modules_changed(file_paths):
+                # Código do workspace pré-carregado no zygote: ele precisa importar de novo
+                log.info("A module preloaded by the zygote changed; restarting the zygote")
+                zygote.restart()
+                file_paths = [root_dir]
+        for file_path in file_paths:
+            project = os.path.relpath(os.path.abspath(file_path), root_dir).split(os.sep)[0]
+            if is_function_project(root_dir, project):
+                pools = [pool for key, pool in cls._pools.items() if key.split(".")[0] == project]
+            else:
+                pools = cls._pools.values()  # Código compartilhado (SharedLibraries, raiz do workspace)
+            for pool in pools:
+                recycled[pool.key] = pool
+        for pool in recycled.values():
+            pool.recycle()
+        return list(recycled)
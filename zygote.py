@@ -0,0 +1,122 @@
+"""Zygote of EXECUTION_MODE=zygote: a process that imports the stable base layer once and forks the workers.
+
+The base layer is made of the third-party packages imported by the workspace code (pandas, azure
+SDKs...) plus ZYGOTE_PRELOAD. Workers forked from the zygote start with it already imported and
+import only the project code, so a hot reload replaces them with clean interpreters in milliseconds
+instead of reloading modules in place. The zygote is the multiprocessing forkserver.
+"""
+import os
+import ast
+import sys
+import time
+import threading
+import importlib.util
+import multiprocessing
+import multiprocessing.forkserver
+from typing import Iterable, List, Set
+
+from file_watcher import IGNORED_DIRECTORIES
+from logger import get_logger
+
+log = get_logger("zygote")
+
+# Módulos do LocalRunner usados pelos workers, importados uma vez no zygote
+RUNNER_MODULES = ["azure.functions", "context_execution_singleton", "worker_pool"]
+
+_preloaded: List[str] = []
+_preloaded_files: Set[str] = set()  # Arquivos do workspace importados pelo zygote
+
+def is_supported() -> bool:
+    return "forkserver" in multiprocessing.get_all_start_methods()
+
+def _source_files(directories: Iterable[str]):
+    for directory in directories:
+        for current, subdirectories, files in os.walk(directory):
+            subdirectories[:] = [name for name in subdirectories if name not in IGNORED_DIRECTORIES and not name.startswith(".")]
+            for name in files:
+                if name.endswith(".py"):
+                    yield os.path.join(current, name)
+
+def _absolute_imports(file_path: str) -> Set[str]:
+    try:
+        with open(file_path, "rb") as file:
+            tree = ast.parse(file.read(), filename=file_path)
+    except (SyntaxError, ValueError, OSError):
+        return set()
+    imports = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            imports.add(node.module)
+    return imports
+
+def _is_third_party(module_name: str, root_dir: str) -> bool:
+    """Top-level package installed outside the workspace (find_spec of a top-level name imports nothing)."""
+    top_level = module_name.split(".")[0]
+    if top_level in sys.stdlib_module_names:
+        return True
+    try:
+        spec = importlib.util.find_spec(top_level)
+    except (ImportError, ValueError):
+        return False
+    if spec is None:
+        return False
+    locations = [spec.origin] if spec.origin and spec.origin not in ("built-in", "frozen") else list(spec.submodule_search_locations or [])
+    if not locations:
+        return True
+    return not os.path.abspath(locations[0]).startswith(root_dir + os.sep)
+
+def base_layer(root_dir: str, directories: Iterable[str]) -> List[str]:
+    """Third-party modules imported by the code of the directories, plus ZYGOTE_PRELOAD."""
+    root_dir = os.path.abspath(root_dir)
+    imported = set()
+    for file_path in _source_files(directories):
+        imported.update(_absolute_imports(file_path))
+    modules = {name for name in imported if _is_third_party(name, root_dir)}
+    modules.update(name.strip() for name in os.getenv("ZYGOTE_PRELOAD", "").split(",") if name.strip())
+    return sorted(modules)
+
+def module_files(module_name: str, directories: Iterable[str]) -> List[str]:
+    """Candidate source files of a workspace module in the directories, without importing it."""
+    files = []
+    for directory in directories:
+        base = os.path.join(os.path.abspath(directory), *module_name.split("."))
+        files += [base + ".py", os.path.join(base, "__init__.py")]
+    return files
+
+def workspace_modules_changed(file_paths: Iterable[str]) -> bool:
+    """Whether a changed file belongs to a workspace module preloaded by the zygote (ZYGOTE_PRELOAD)."""
+    return any(os.path.abspath(file_path) in _preloaded_files for file_path in file_paths)
+
+def context(root_dir: str, directories: Iterable[str]):
+    """forkserver context whose server preloads the base layer."""
+    global _preloaded
+    if not _preloaded:
+        start = time.perf_counter()
+        directories = list(directories)
+        _preloaded = RUNNER_MODULES + base_layer(root_dir, directories)
+        for name in _preloaded:
+            _preloaded_files.update(module_files(name, [root_dir] + directories))
+        log.info(f"Zygote base layer: {len(_preloaded)} modules found in {(time.perf_counter() - start) * 1000:.0f}ms")
+    forkserver_context = multiprocessing.get_context("forkserver")
+    forkserver_context.set_forkserver_preload(_preloaded)
+    return forkserver_context
+
+def restart():
+    """Detach the running zygote; the next worker starts a new one that imports the base layer again.
+
+    The old zygote exits by itself once the workers forked from it are gone (they hold its alive pipe)."""
+    server = multiprocessing.forkserver._forkserver
+    if not hasattr(server, "_forkserver_alive_fd"):
+        log.warning("This Python cannot restart the zygote; restart LocalRunner to reload the preloaded modules")
+        return
+    with server._lock:
+        pid = server._forkserver_pid
+        if pid is None:
+            return
+        os.close(server._forkserver_alive_fd)
+        server._forkserver_alive_fd = None
+        server._forkserver_pid = None
+        server._forkserver_address = None
+    threading.Thread(target=os.waitpid, args=(pid, 0), name="localrunner-zygote-reaper", daemon=True).start()